@@ -0,0 +1,185 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import JsonResponse
+from django.test import TestCase, TransactionTestCase, SimpleTestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.common.response import accepts_gzip
+from apps.db.models import PeerInfo, DeviceGroup, DeviceGroupPeer
+from apps.db.service import PeerInfoService, DeviceGroupPeerService, TokenService
+
+
+class PeersFixtureMixin:
+    """
+    /api/peers 测试的公共数据：管理员用户、两个设备组与登录令牌
+    """
+
+    @classmethod
+    def create_fixtures(cls):
+        cls.user = User.objects.create_user('peers_admin', password='password', is_superuser=True, is_staff=True)
+        cls.zeta = DeviceGroup.objects.create(name='zeta')
+        cls.alpha = DeviceGroup.objects.create(name='alpha')
+
+    def login(self):
+        response = self.client.post(
+            '/api/login',
+            json.dumps({
+                'username': 'peers_admin',
+                'password': 'password',
+                'id': 'login-peer',
+                'uuid': 'login-uuid',
+                'deviceInfo': {'os': 'linux', 'type': 'client', 'name': 'tests'},
+            }),
+            content_type='application/json',
+        )
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access_token']}"}
+
+    def grow_fleet(self, start: int, size: int):
+        """
+        新增 size 台设备：部分设备不属于任何设备组，部分同时属于多个设备组
+
+        :param start: 起始编号
+        :param size: 设备数量
+        """
+        for i in range(start, start + size):
+            peer = PeerInfo.objects.create(
+                peer_id=f'peer-{i}',
+                uuid=f'uuid-{i}',
+                cpu='cpu',
+                device_name=f'device-{i}',
+                memory='8G',
+                os='windows' if i % 2 else 'linux',
+                username=None if i % 3 == 0 else f'user-{i}',
+                version='1.4.0',
+                note='note' if i % 2 else '',
+            )
+            if i % 4 == 1:
+                DeviceGroupPeer.objects.create(device_group=self.zeta, peer=peer)
+            elif i % 4 == 2:
+                DeviceGroupPeer.objects.create(device_group=self.zeta, peer=peer)
+                DeviceGroupPeer.objects.create(device_group=self.alpha, peer=peer)
+
+    def legacy_response(self) -> bytes:
+        """
+        旧实现：逐台设备查询所属设备组，整体以 JsonResponse 编码
+
+        :return: 响应内容
+        :rtype: bytes
+        """
+        data = []
+        for client in PeerInfoService().get_list():
+            groups = DeviceGroupPeerService().get_groups_for_peer(client)
+            data.append({
+                "id": client.peer_id,
+                "info": {
+                    "device_name": client.device_name,
+                    "os": client.os,
+                    "username": client.username,
+                },
+                "status": 1,
+                "user_name": self.user.username,
+                "device_group_name": groups[0].name if groups else "",
+                "note": client.note or "",
+            })
+        return JsonResponse({'total': len(data), 'data': data}).content
+
+    def fetch_peers(self) -> tuple[bytes, int]:
+        """
+        请求完整设备列表
+
+        :return: (响应内容, 查询次数)
+        :rtype: tuple[bytes, int]
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/peers', **self.headers)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(response.status_code, 200)
+        return content, len(queries)
+
+
+
+class PeersApiTest(PeersFixtureMixin, TestCase):
+    """
+    /api/peers 的查询次数不随设备数量增长，且响应与逐设备查询设备组的旧实现逐字节一致
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+
+    def setUp(self):
+        self.login()
+
+    def test_query_count_and_body_across_fleet_sizes(self):
+        self.fetch_peers()
+
+        self.grow_fleet(0, 10)
+        small, small_queries = self.fetch_peers()
+        self.assertEqual(small, self.legacy_response())
+
+        self.grow_fleet(10, 200)
+        large, large_queries = self.fetch_peers()
+        self.assertEqual(large, self.legacy_response())
+        self.assertEqual(json.loads(large)['total'], PeerInfo.objects.count())
+        self.assertEqual(large_queries, small_queries)
+
+
+class PeersEtagTest(PeersFixtureMixin, TransactionTestCase):
+    """
+    /api/peers 的 ETag 随设备、设备组与当前用户名的变化而变化
+
+    版本号在事务提交后递增，使用 TransactionTestCase 以真实提交每次写入
+    """
+
+    def setUp(self):
+        self.create_fixtures()
+        self.login()
+
+    def fetch_etag(self) -> str:
+        response = self.client.get('/api/peers', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assert_not_modified(self, etag: str):
+        response = self.client.get('/api/peers', HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_direct_model_writes(self):
+        self.grow_fleet(0, 3)
+        etag = self.fetch_etag()
+        self.assert_not_modified(etag)
+
+        # 直接保存模型（Web 管理页、shell）同样递增设备列表版本号
+        self.zeta.name = 'omega'
+        self.zeta.save()
+        renamed_group = self.fetch_etag()
+        self.assertNotEqual(renamed_group, etag)
+
+        DeviceGroupPeer.objects.filter(device_group=self.alpha).delete()
+        regrouped = self.fetch_etag()
+        self.assertNotEqual(regrouped, renamed_group)
+
+        # 响应中包含用户名：改名后不能再返回 304
+        User.objects.filter(pk=self.user.pk).update(username='peers_owner')
+        TokenService.invalidate_user(self.user)
+        response = self.client.get('/api/peers', HTTP_IF_NONE_MATCH=regrouped, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"user_name": "peers_owner"', b''.join(response.streaming_content))
+
+
+class AcceptsGzipTest(SimpleTestCase):
+    """
+    按 Accept-Encoding 的 q 值判断是否返回 gzip 响应
+    """
+
+    def assert_accepts(self, header: str, expected: bool):
+        request = RequestFactory().get('/api/ab', HTTP_ACCEPT_ENCODING=header)
+        self.assertIs(accepts_gzip(request), expected, header)
+
+    def test_q_values(self):
+        for header in ('gzip', 'br, gzip;q=0.5', 'GZIP', 'x-gzip', '*', 'deflate, *;q=0.1'):
+            self.assert_accepts(header, True)
+        for header in ('', 'identity', 'gzip;q=0', 'gzip; q=0.0, deflate', '*;q=0', 'gzip;q=0, *'):
+            self.assert_accepts(header, False)
@@ -1,17 +1,26 @@
+import functools
 import json
 import logging
 import traceback
 
 from django.http import HttpRequest, JsonResponse, HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_http_methods
 
-from apps.client_apis.common import request_debug_log, check_login
+from apps.client_apis.common import request_debug_log, check_login, conditional_response
+from apps.common.response import StreamingJsonResponse, JsonStream, ITERATOR_CHUNK_SIZE, batched, \
+    accepts_gzip, gzip_content, gzipped_response
 from apps.db.models import Personal
 from apps.db.service import TokenService, AliasService, TagService, PersonalService, SharePersonalService, \
-    UserConfigService
+    UserConfigService, ResourceVersionService
+from common.env import PublicConfig
+from common.lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# (user_id, 内容哈希) -> gzip 压缩后的 Legacy 地址簿响应体
+_legacy_ab_gzip = LRUCache(PublicConfig.AB_SNAPSHOT_CACHE_SIZE)
+
 
 @request_debug_log
 @require_http_methods(["GET", "POST"])
@@ -20,21 +29,47 @@ def ab(request: HttpRequest):
     """
     Legacy 地址簿接口
 
-    GET: 拉取整个地址簿数据
-    POST: 推送整个地址簿数据
+    GET: 拉取整个地址簿数据。以内容哈希作为 ETag，未变化时按 If-None-Match 返回 304；
+    客户端接受 gzip 时总是返回按内容哈希缓存的压缩响应体，使 ETag 与实际返回的表示一致
+    POST: 推送整个地址簿数据（压缩存储，内容未变化时不写入）
     """
     token_service = TokenService(request=request)
     user_info = token_service.user_info
     config_service = UserConfigService(user_info)
 
     if request.method == "GET":
-        data = config_service.get_legacy_ab()
-        if data is None:
-            return HttpResponse('null', content_type='application/json')
-        return JsonResponse({
-            'licensed_devices': 0,
-            'data': data,
-        })
+        digest = config_service.get_legacy_ab_hash()
+
+        # 在生成 ETag 之前确定返回的表示：有内容哈希且客户端接受 gzip 时一律压缩
+        use_gzip = digest is not None and accepts_gzip(request)
+
+        def build():
+            cache_key = (user_info.id, digest)
+            if use_gzip and (compressed := _legacy_ab_gzip.get(cache_key)) is not None:
+                return gzipped_response(compressed)
+            data = config_service.get_legacy_ab()
+            if data is None:
+                response = HttpResponse('null', content_type='application/json')
+            else:
+                response = JsonResponse({
+                    'licensed_devices': 0,
+                    'data': data,
+                })
+            if not use_gzip:
+                return response
+            compressed = gzip_content(response.content)
+            if data is not None:
+                _legacy_ab_gzip.set(cache_key, compressed)
+            return gzipped_response(compressed)
+
+        if digest is None:
+            response = build()
+        else:
+            # gzip 与未压缩的表示使用不同的 ETag
+            response = conditional_response(request, f'"{digest}-gzip"' if use_gzip else f'"{digest}"', build)
+        # 两种表示（包括 304）都声明随 Accept-Encoding 变化，避免共享缓存混用
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
 
     try:
         body = json.loads(request.body.decode('utf-8'))
@@ -77,14 +112,18 @@ def ab_tags(request, guid):
     token_service = TokenService(request=request)
     user_info = token_service.user_info
     tag_service = TagService(guid=guid, user=user_info)
-    tags = tag_service.get_all_tags()
-    data = [
-        {
-            'name': tag.tag,
-            'color': int(tag.color),
-        } for tag in tags
-    ]
-    return JsonResponse(data, safe=False, status=200)
+
+    def build():
+        data = [
+            {
+                'name': tag.tag,
+                'color': int(tag.color),
+            } for tag in tag_service.get_all_tags()
+        ]
+        return JsonResponse(data, safe=False, status=200)
+
+    etag = ResourceVersionService().etag(ResourceVersionService.ab_key(guid), scope=str(user_info.id))
+    return conditional_response(request, etag, build)
 
 
 @request_debug_log
@@ -179,12 +218,58 @@ def ab_shared_profiles(request):
     return JsonResponse(data)
 
 
+_OS_PLATFORMS = {
+    'windows': 'Windows',
+    'linux': 'Linux',
+    'macos': 'Mac OS',
+    'android': 'Android',
+    'ios': 'iOS',
+}
+
+# guid -> (资源版本号, 序列化后的响应字节)；版本号变化时惰性重建
+_ab_snapshots = LRUCache(PublicConfig.AB_SNAPSHOT_CACHE_SIZE)
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve_platform(os_str: str) -> str:
+    key = (os_str or '').split(' / ')[0].strip().lower()
+    platform = _OS_PLATFORMS.get(key)
+    if platform:
+        return platform
+    if 'linux' in key:
+        return 'Linux'
+    return key or ''
+
+
+def _iter_ab_peers(peers_qs, guid, user):
+    # 按批次预取 alias 和 tags，避免 N+1，且内存占用与地址簿大小无关
+    alias_service = AliasService()
+    tag_service = TagService(guid=guid, user=user)
+    for batch in batched(peers_qs.iterator(chunk_size=ITERATOR_CHUNK_SIZE), ITERATOR_CHUNK_SIZE):
+        peer_ids = [p.peer.peer_id for p in batch]
+        alias_map = alias_service.get_alias_map(guid=guid, peer_ids=peer_ids)
+        tags_map = tag_service.get_tags_map(peer_ids)
+        for p in batch:
+            yield {
+                "id": p.peer.peer_id,
+                "username": p.peer.username,
+                "hostname": p.peer.device_name,
+                "alias": alias_map.get(p.peer.peer_id, ""),
+                "platform": _resolve_platform(p.peer.os),
+                "tags": tags_map.get(p.peer.peer_id, []),
+            }
+
+
 @request_debug_log
 @require_http_methods(["POST"])
 @check_login
 def ab_peers(request):
     """
     返回用户添加到地址簿的设备列表
+
+    响应附带 ETag，地址簿与设备信息未变化时按 If-None-Match 返回 304。
+    设备数不超过 ``AB_SNAPSHOT_MAX_PEERS`` 的地址簿缓存序列化结果（按 guid 共享，
+    版本号变化时重建）；更大的地址簿流式输出。
     :param request:
     :return:
     """
@@ -193,56 +278,41 @@ def ab_peers(request):
     request_query = token_service.request_query
     guid = request_query.get('ab')
 
-    personal_service = PersonalService()
-    try:
-        # 结合 select_related 一次性拉取 `peer`，避免 N+1
-        peers_qs = personal_service.get_personal(guid).personal_peer.select_related('peer').all()
-    except Exception:
-        logger.error(f'[ab_peers] get personal error: {guid}')
-        return JsonResponse(
-            {
-                "total": 0,
-                "data": []
-            }
-        )
-
-    # 预取 alias 和 tags，使用批量映射减少查询
-    peer_ids = [p.peer.peer_id for p in peers_qs]
-    alias_map = AliasService().get_alias_map(guid=guid, peer_ids=peer_ids)
-    tags_map = TagService(guid=guid, user=user_info).get_tags_map(peer_ids)
-
-    os_map = {
-        'windows': 'Windows',
-        'linux': 'Linux',
-        'macos': 'Mac OS',
-        'android': 'Android',
-        'ios': 'iOS',
-    }
-
-    def _resolve_platform(os_str: str) -> str:
-        key = (os_str or '').split(' / ')[0].strip().lower()
-        platform = os_map.get(key)
-        if platform:
-            return platform
-        if 'linux' in key:
-            return 'Linux'
-        return key or ''
-
-    result = {
-        "total": peers_qs.count(),
-        "data": [
-            {
-                "id": p.peer.peer_id,
-                "username": p.peer.username,
-                "hostname": p.peer.device_name,
-                "alias": alias_map.get(p.peer.peer_id, ""),
-                "platform": _resolve_platform(p.peer.os),
-                "tags": tags_map.get(p.peer.peer_id, []),
-            } for p in peers_qs
-        ]
-    }
-
-    return JsonResponse(result)
+    version_service = ResourceVersionService()
+    names = (ResourceVersionService.PEERS, ResourceVersionService.ab_key(guid))
+    versions = version_service.versions(*names)
+
+    def build():
+        snapshot = _ab_snapshots.get(guid)
+        if snapshot is not None and snapshot[0] == versions:
+            return HttpResponse(snapshot[1], content_type='application/json')
+
+        personal_service = PersonalService()
+        try:
+            # 结合 select_related 一次性拉取 `peer`，避免 N+1
+            peers_qs = personal_service.get_personal(guid).personal_peer.select_related('peer').all()
+        except Exception:
+            logger.error(f'[ab_peers] get personal error: {guid}')
+            return JsonResponse(
+                {
+                    "total": 0,
+                    "data": []
+                }
+            )
+
+        total = peers_qs.count()
+        response = StreamingJsonResponse({
+            "total": total,
+            "data": JsonStream(_iter_ab_peers(peers_qs, guid, user_info)),
+        })
+        if total > PublicConfig.AB_SNAPSHOT_MAX_PEERS:
+            return response
+        content = b''.join(response.streaming_content)
+        _ab_snapshots.set(guid, (versions, content))
+        return HttpResponse(content, content_type='application/json')
+
+    etag = version_service.make_etag(names, versions, scope=str(user_info.id))
+    return conditional_response(request, etag, build)
 
 
 @request_debug_log
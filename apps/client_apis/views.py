@@ -7,12 +7,13 @@ from django.http import HttpRequest, JsonResponse, HttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
-from apps.client_apis.common import check_login, request_debug_log
+from apps.client_apis.common import check_login, request_debug_log, conditional_response
+from apps.common.response import StreamingJsonResponse, JsonStream, ITERATOR_CHUNK_SIZE
 from apps.db.models import DevicePermission
 from apps.db.service import (
     HeartBeatService, PeerInfoService, TokenService, UserService,
-    LoginClientService, DeviceGroupService, PermissionService,
-    DeviceGroupPeerService, )
+    LoginClientService, DeviceGroupService, PermissionService, ResourceVersionService, )
+from common.generation import generations
 from common.utils import get_local_time, str2bool
 
 logger = logging.getLogger(__name__)
@@ -60,6 +61,9 @@ def heartbeat(request: HttpRequest):
 
         TokenService().renew_token_if_alive(uuid)
 
+        # 设备未知或系统信息过期时，通过响应要求客户端重新上报
+        if PeerInfoService().needs_sysinfo(uuid):
+            return JsonResponse({'sysinfo': True})
         return HttpResponse(status=200)
     except json.JSONDecodeError as e:
         logger.error(f"心跳请求JSON解析失败: {e}")
@@ -255,6 +259,13 @@ def peers(request: HttpRequest):
     """
     展示当前用户有查看权限的设备信息
 
+    查询参数：
+      - ``current`` / ``pageSize``：页码与每页条数（OFFSET 分页），未提供 ``pageSize`` 时返回全部设备
+      - ``cursor``：键集分页游标，提供该参数（首页传空值）即启用，响应附带 ``next_cursor``
+      - ``os`` / ``status``：操作系统与在线状态（online/offline）筛选，与 Web 设备列表一致
+
+    响应附带 ETag，设备数据未变化时按 If-None-Match 返回 304（按在线状态筛选时除外）。
+
     :param request: HTTP 请求对象
     :return: JSON 响应，形如 {"total": N, "data": [...]}
     :rtype: JsonResponse
@@ -266,30 +277,77 @@ def peers(request: HttpRequest):
     if not perm_service.has_perm(user_info, DevicePermission.VIEW):
         return JsonResponse({'total': 0, 'data': []})
 
-    dgp_service = DeviceGroupPeerService()
-    client_list = list(PeerInfoService().get_list())
+    try:
+        current = max(int(request.GET.get('current', 1)), 1)
+    except (TypeError, ValueError):
+        current = 1
+    try:
+        page_size = int(request.GET.get('pageSize', 0))
+    except (TypeError, ValueError):
+        page_size = 0
+    cursor = request.GET.get('cursor')
+
+    status = (request.GET.get('status') or '').strip().lower()
+    peer_service = PeerInfoService()
+    base_qs = peer_service.filter_peers(
+        os_param=(request.GET.get('os') or '').strip(),
+        status=status,
+    )
+    qs = base_qs
+    if cursor:
+        try:
+            qs = peer_service.after_cursor(base_qs, cursor)
+        except ValueError:
+            return HttpResponse(status=400)
+    if cursor is not None and page_size <= 0:
+        page_size = 100
 
-    data = []
-    for client in client_list:
-        groups = dgp_service.get_groups_for_peer(client)
-        group_name = groups[0].name if groups else ""
-        data.append({
-            "id": client.peer_id,
+    def serialize(client: dict) -> dict:
+        return {
+            "id": client['peer_id'],
             "info": {
-                "device_name": client.device_name,
-                "os": client.os,
-                "username": client.username,
+                "device_name": client['device_name'],
+                "os": client['os'],
+                "username": client['username'],
             },
             "status": 1,
             "user_name": user_info.username,
-            "device_group_name": group_name,
-            "note": client.note or "",
-        })
+            "device_group_name": client['device_group_name'],
+            "note": client['note'] or "",
+        }
 
-    return JsonResponse({
-        'total': len(data),
-        'data': data
-    })
+    def build():
+        if cursor is None and page_size <= 0:
+            # 全量列表：逐批从数据库读取并流式编码，内存占用与设备数量无关
+            rows = peer_service.get_list_with_group_name(qs).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+            return StreamingJsonResponse({
+                'total': base_qs.count(),
+                'data': JsonStream(serialize(client) for client in rows),
+            })
+
+        if cursor is not None:
+            rows = list(peer_service.get_list_with_group_name(qs)[:page_size])
+        else:
+            start = (current - 1) * page_size
+            rows = list(peer_service.get_list_with_group_name(qs)[start:start + page_size])
+        result = {
+            'total': base_qs.count(),
+            'data': [serialize(client) for client in rows],
+        }
+        if cursor is not None:
+            result['next_cursor'] = peer_service.encode_cursor(rows[-1]) if len(rows) == page_size else None
+        return JsonResponse(result)
+
+    if status in ('online', 'offline'):
+        # 在线状态随心跳变化，不使用 ETag
+        return build()
+    # 响应包含当前用户名，可见性取决于权限：用户名与权限代数一并计入 ETag
+    etag = ResourceVersionService().etag(
+        ResourceVersionService.PEERS,
+        scope=f'{user_info.id}:{user_info.username}:{generations.get(PermissionService.GENERATION_KEY)}:'
+              f'{request.GET.urlencode()}',
+    )
+    return conditional_response(request, etag, build)
 
 
 @request_debug_log
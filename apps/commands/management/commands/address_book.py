@@ -0,0 +1,83 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.db.service import PersonalService, PersonalTransferService, UserService
+
+
+class Command(BaseCommand):
+    help = '地址簿批量导入导出（JSONL/CSV，记录格式为 {peer_id, alias, tags}）'
+
+    def add_arguments(self, parser):
+        """添加命令行参数。
+
+        :param parser: 参数解析器对象
+        """
+        parser.add_argument(
+            'action',
+            choices=['import', 'export'],
+            help='导入或导出',
+        )
+
+        parser.add_argument(
+            'guid',
+            type=str,
+            help='地址簿 guid',
+        )
+
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='文件路径，"-" 表示标准输入/输出',
+        )
+
+        parser.add_argument(
+            '--format',
+            choices=PersonalTransferService.FORMATS,
+            help='数据格式，默认按文件扩展名判断，否则为 jsonl',
+        )
+
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='导入的标签记为该用户设置，默认为地址簿创建者',
+        )
+
+    def handle(self, *args, **options):
+        """处理命令逻辑。
+
+        :param options: 命令行选项字典
+        """
+        guid = options['guid']
+        path = options['path']
+        personal = PersonalService().get_personal(guid)
+        if not personal:
+            raise CommandError(f'地址簿不存在: {guid}')
+
+        fmt = options.get('format') or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        if options.get('user'):
+            user = UserService().get_user_by_name(options['user'])
+            if not user:
+                raise CommandError(f'用户不存在: {options["user"]}')
+        else:
+            user = personal.creator
+        service = PersonalTransferService(guid, user)
+
+        if options['action'] == 'export':
+            out = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+            try:
+                for part in service.dump(service.iter_export(), fmt):
+                    out.write(part)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            return
+
+        src = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        try:
+            result = service.import_rows(PersonalTransferService.parse(src, fmt))
+        finally:
+            if src is not sys.stdin:
+                src.close()
+        print(', '.join(f'{key}: {count}' for key, count in result.items()))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.db.service import MaintenanceService
+
+
+class Command(BaseCommand):
+    help = '清理过期令牌、过期会话、失效登录客户端记录与长期无心跳的设备心跳'
+
+    def add_arguments(self, parser):
+        """添加命令行参数。
+
+        :param parser: 参数解析器对象
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每批删除的行数',
+        )
+
+    def handle(self, *args, **options):
+        """处理命令逻辑。
+
+        :param options: 命令行选项字典
+        """
+        result = MaintenanceService(batch_size=options['batch_size']).sweep()
+        for table, count in result.items():
+            print(f'{table}: 删除 {count} 行')
@@ -0,0 +1,162 @@
+import gzip
+import itertools
+import re
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+# 合并小片段后再输出，减少写入次数（字节数）
+STREAM_BUFFER_SIZE = 64 * 1024
+# 流式输出时 QuerySet.iterator() 每次从数据库取回的行数
+ITERATOR_CHUNK_SIZE = 2000
+
+_Q_VALUE = re.compile(r'^q=([0-9.]+)$', re.IGNORECASE)
+
+
+class JsonStream:
+    """
+    流式 JSON 数组的占位：放在响应数据中任意位置，由 ``StreamingJsonResponse`` 逐项编码输出
+
+    :param iterable: 数组元素的可迭代对象（通常是基于 ``QuerySet.iterator()`` 的生成器）
+    """
+
+    __slots__ = ('iterable',)
+
+    def __init__(self, iterable: Iterable):
+        self.iterable = iterable
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """
+    流式 JSON 响应
+
+    输出字节与 ``JsonResponse`` 相同（相同的编码器与分隔符），区别在于 ``JsonStream`` 中的元素
+    边迭代边编码，不在内存中构建完整的列表与 JSON 字符串。
+
+    :param data: 响应数据，可包含 ``JsonStream``
+    :param encoder: JSON 编码器类
+    :param json_dumps_params: 传给编码器的参数
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, json_dumps_params=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        self._json_encoder = encoder(**(json_dumps_params or {}))
+        super().__init__(streaming_content=self._buffered(self._encode(data)), **kwargs)
+
+    def _encode(self, obj) -> Iterator[str]:
+        if isinstance(obj, JsonStream):
+            yield '['
+            for i, item in enumerate(obj.iterable):
+                if i:
+                    yield self._json_encoder.item_separator
+                yield self._json_encoder.encode(item)
+            yield ']'
+        elif isinstance(obj, dict) and _contains_stream(obj):
+            yield '{'
+            for i, (key, value) in enumerate(obj.items()):
+                if i:
+                    yield self._json_encoder.item_separator
+                yield self._json_encoder.encode(str(key))
+                yield self._json_encoder.key_separator
+                yield from self._encode(value)
+            yield '}'
+        elif isinstance(obj, (list, tuple)) and _contains_stream(obj):
+            yield '['
+            for i, item in enumerate(obj):
+                if i:
+                    yield self._json_encoder.item_separator
+                yield from self._encode(item)
+            yield ']'
+        else:
+            yield self._json_encoder.encode(obj)
+
+    @staticmethod
+    def _buffered(parts: Iterator[str]) -> Iterator[bytes]:
+        buffer = []
+        size = 0
+        for part in parts:
+            buffer.append(part)
+            size += len(part)
+            if size >= STREAM_BUFFER_SIZE:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+
+
+def _contains_stream(obj) -> bool:
+    if isinstance(obj, JsonStream):
+        return True
+    if isinstance(obj, dict):
+        return any(_contains_stream(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_contains_stream(item) for item in obj)
+    return False
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    按固定大小分批迭代（用于流式输出时按批次预取别名、标签等关联数据）
+
+    :param iterable: 可迭代对象
+    :param size: 每批数量
+    :rtype: Iterator[list]
+    """
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def accepts_gzip(request: HttpRequest) -> bool:
+    """
+    判断客户端是否接受 gzip 编码的响应
+
+    按 RFC 9110 解析 ``Accept-Encoding`` 的 q 值：``gzip;q=0`` 表示拒绝；未列出 gzip 时按 ``*`` 的 q 值判断
+
+    :param request: HTTP请求对象
+    :rtype: bool
+    """
+    qualities = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            if match := _Q_VALUE.match(param.replace(' ', '')):
+                try:
+                    quality = float(match.group(1))
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def gzip_content(content: bytes) -> bytes:
+    """
+    gzip 压缩响应体（固定 mtime，相同内容得到相同字节，便于缓存）
+
+    :param content: 原始响应体
+    :rtype: bytes
+    """
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def gzipped_response(compressed: bytes, content_type: str = 'application/json', **kwargs) -> HttpResponse:
+    """
+    返回已压缩的响应体，附带 ``Content-Encoding: gzip``
+
+    :param compressed: gzip_content 的返回值
+    :param content_type: 原始内容类型
+    :rtype: HttpResponse
+    """
+    response = HttpResponse(compressed, content_type=content_type, **kwargs)
+    response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
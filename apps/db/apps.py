@@ -33,3 +33,6 @@ class DbConfig(AppConfig):
                 logger.warning(f"SQLite PRAGMA 设置失败: {e}")
 
         connection_created.connect(_configure_sqlite, weak=False)
+
+        # 权限缓存失效等模型信号
+        from apps.db import signals  # noqa: F401
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0008_refactor_global_role_permission"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="peerinfo",
+            name="sysinfo_hash",
+            field=models.CharField(
+                blank=True, default="", max_length=64, verbose_name="系统信息指纹"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:23
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def forwards(apps, schema_editor):
+    # 已有设备以迁移时间作为上报时间，避免升级后心跳同时要求所有设备重新上报
+    PeerInfo = apps.get_model("db", "PeerInfo")
+    PeerInfo.objects.filter(sysinfo_at__isnull=True).update(sysinfo_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0009_peerinfo_sysinfo_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="peerinfo",
+            name="sysinfo_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="系统信息上报时间"
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
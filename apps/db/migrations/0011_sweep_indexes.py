@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0010_peerinfo_sysinfo_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="heartbeat",
+            name="modified_at",
+            field=models.DateTimeField(db_index=True, verbose_name="修改时间"),
+        ),
+        migrations.AlterField(
+            model_name="token",
+            name="last_used_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="最后使用时间"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0011_sweep_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="peerinfo",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="peer_info_created_idx"
+            ),
+        ),
+    ]
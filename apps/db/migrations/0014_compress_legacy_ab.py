@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:45
+
+import base64
+import hashlib
+import zlib
+
+from django.db import migrations
+
+ZLIB_MARKER = "zlib:"
+
+
+def forwards(apps, schema_editor):
+    # 已有的 Legacy 地址簿改为压缩存储，并补充内容哈希
+    UserConfig = apps.get_model("db", "UserConfig")
+    for conf in UserConfig.objects.filter(config_name="legacy_ab").iterator():
+        value = conf.config_value or ""
+        if value.startswith(ZLIB_MARKER):
+            continue
+        raw = value.encode("utf-8")
+        conf.config_value = ZLIB_MARKER + base64.b64encode(zlib.compress(raw)).decode("ascii")
+        conf.save(update_fields=["config_value"])
+        UserConfig.objects.update_or_create(
+            user_id=conf.user_id,
+            config_name="legacy_ab_hash",
+            defaults={"config_value": hashlib.sha256(raw).hexdigest()},
+        )
+
+
+def backwards(apps, schema_editor):
+    UserConfig = apps.get_model("db", "UserConfig")
+    for conf in UserConfig.objects.filter(config_name="legacy_ab").iterator():
+        if conf.config_value.startswith(ZLIB_MARKER):
+            raw = zlib.decompress(base64.b64decode(conf.config_value[len(ZLIB_MARKER):]))
+            conf.config_value = raw.decode("utf-8")
+            conf.save(update_fields=["config_value"])
+    UserConfig.objects.filter(config_name="legacy_ab_hash").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0013_resourceversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0014_compress_legacy_ab"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PeerTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("peer_id", models.CharField(max_length=255, verbose_name="设备ID")),
+                (
+                    "guid",
+                    models.ForeignKey(
+                        db_column="guid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="peer_tags",
+                        to="db.personal",
+                        to_field="guid",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="peer_tags",
+                        to="db.tag",
+                        verbose_name="标签",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="peer_tags",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="设置者",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "设备标签成员",
+                "db_table": "peer_tag",
+                "indexes": [
+                    models.Index(
+                        fields=["guid", "peer_id"], name="peer_tag_guid_peer_idx"
+                    )
+                ],
+                "unique_together": {("guid", "tag", "peer_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:10
+
+import ast
+import json
+
+from django.db import migrations
+
+
+def parse_tag_ids(raw):
+    # 客户端写入的标签 ID 列表：JSONField 原生 list、JSON 字符串或 Python 字面量字符串
+    value = raw
+    if isinstance(raw, str):
+        s = raw.strip()
+        value = None
+        for loads in (json.loads, ast.literal_eval):
+            try:
+                value = loads(s)
+                break
+            except Exception:
+                continue
+    if not isinstance(value, list):
+        return None
+    return {int(t) for t in map(str, value) if t.strip().isdigit()}
+
+
+def forwards(apps, schema_editor):
+    # 标签 ID 列表行转换为成员关系行；Web 写入的逗号分隔名称保持不变
+    ClientTags = apps.get_model("db", "ClientTags")
+    PeerTag = apps.get_model("db", "PeerTag")
+    Tag = apps.get_model("db", "Tag")
+
+    tag_guids = dict(Tag.objects.values_list("id", "guid_id"))
+    converted = []
+    members = []
+    for row in ClientTags.objects.all().iterator(chunk_size=2000):
+        tag_ids = parse_tag_ids(row.tags)
+        if tag_ids is None:
+            continue
+        converted.append(row.id)
+        for tag_id in sorted(tag_ids):
+            if tag_guids.get(tag_id) == row.guid_id:
+                members.append(PeerTag(guid_id=row.guid_id, tag_id=tag_id, peer_id=row.peer_id, user_id=row.user_id))
+    PeerTag.objects.bulk_create(members, batch_size=2000, ignore_conflicts=True)
+    for start in range(0, len(converted), 500):
+        ClientTags.objects.filter(id__in=converted[start:start + 500]).delete()
+
+
+def backwards(apps, schema_editor):
+    ClientTags = apps.get_model("db", "ClientTags")
+    PeerTag = apps.get_model("db", "PeerTag")
+
+    rows = {}
+    for guid_id, peer_id, tag_id, user_id in PeerTag.objects.order_by("tag_id").values_list(
+        "guid_id", "peer_id", "tag_id", "user_id"
+    ):
+        row = rows.setdefault((guid_id, peer_id), {"user_id": user_id, "tags": []})
+        row["tags"].append(tag_id)
+        row["user_id"] = row["user_id"] or user_id
+    for (guid_id, peer_id), row in rows.items():
+        if row["user_id"] is None:
+            continue
+        ClientTags.objects.update_or_create(
+            peer_id=peer_id,
+            guid_id=guid_id,
+            defaults={"user_id": row["user_id"], "tags": row["tags"]},
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0015_peertag"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
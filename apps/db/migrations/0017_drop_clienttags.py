@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:40
+
+from django.db import migrations
+
+# 与 TagService.DEFAULT_COLOR 一致（0xFF9E9E9E）
+DEFAULT_COLOR = "4288585374"
+
+
+def forwards(apps, schema_editor):
+    # Web 写入的逗号分隔标签名称：在对应地址簿中创建（或复用）同名标签，并写入成员关系
+    ClientTags = apps.get_model("db", "ClientTags")
+    PeerTag = apps.get_model("db", "PeerTag")
+    Tag = apps.get_model("db", "Tag")
+
+    tag_ids = {(guid_id, name): tag_id for tag_id, guid_id, name in Tag.objects.values_list("id", "guid_id", "tag")}
+    members = []
+    for row in ClientTags.objects.all().iterator(chunk_size=2000):
+        raw = row.tags if isinstance(row.tags, list) else str(row.tags or "").split(",")
+        for name in dict.fromkeys(p for p in (str(t).strip() for t in raw) if p):
+            key = (row.guid_id, name)
+            if key not in tag_ids:
+                tag_ids[key] = Tag.objects.create(tag=name, color=DEFAULT_COLOR, guid_id=row.guid_id).id
+            members.append(PeerTag(guid_id=row.guid_id, tag_id=tag_ids[key], peer_id=row.peer_id, user_id=row.user_id))
+    PeerTag.objects.bulk_create(members, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0016_peertag_from_client_tags"),
+    ]
+
+    operations = [
+        # 回滚时重建的空表由 0016 的回滚从成员关系中重新填充
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name="ClientTags",
+        ),
+    ]
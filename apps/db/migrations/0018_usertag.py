@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def forwards(apps, schema_editor):
+    # 由现有的标签成员关系生成用户标签字典
+    PeerTag = apps.get_model("db", "PeerTag")
+    UserTag = apps.get_model("db", "UserTag")
+    rows = (
+        PeerTag.objects.filter(user__isnull=False)
+        .values("user_id", "tag__tag")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    UserTag.objects.bulk_create(
+        [UserTag(user_id=row["user_id"], tag=row["tag__tag"], count=row["n"]) for row in rows],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0017_drop_clienttags"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tag", models.CharField(max_length=255, verbose_name="标签名称")),
+                ("count", models.IntegerField(default=0, verbose_name="使用次数")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_dictionary",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="用户",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "用户标签字典",
+                "db_table": "user_tag",
+                "unique_together": {("user", "tag")},
+            },
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0018_usertag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loginclient",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="更新时间"
+            ),
+        ),
+    ]
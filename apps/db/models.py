@@ -51,7 +51,7 @@ class HeartBeat(models.Model):
     """
 
     peer_id = models.CharField(max_length=255, verbose_name="客户端ID", unique=True)
-    modified_at = models.DateTimeField(verbose_name="修改时间")
+    modified_at = models.DateTimeField(verbose_name="修改时间", db_index=True)
     uuid = models.CharField(max_length=255, verbose_name="设备UUID", unique=True)
     ver = models.CharField(max_length=255, default="", null=True, verbose_name="版本号")
 
@@ -98,6 +98,8 @@ class PeerInfo(TimestampMixin):
     version = models.CharField(max_length=50, verbose_name="客户端版本")
     is_enabled = models.BooleanField(default=True, verbose_name="是否启用")
     note = models.TextField(default="", blank=True, verbose_name="备注")
+    sysinfo_hash = models.CharField(max_length=64, default="", blank=True, verbose_name="系统信息指纹")
+    sysinfo_at = models.DateTimeField(null=True, blank=True, verbose_name="系统信息上报时间")
     device_group = models.ForeignKey(
         DeviceGroup,
         null=True,
@@ -113,6 +115,7 @@ class PeerInfo(TimestampMixin):
         ordering = ["-created_at"]
         db_table = "peer_info"
         unique_together = [["uuid", "peer_id"]]
+        indexes = [models.Index(fields=["-created_at", "-id"], name="peer_info_created_idx")]
 
     def __str__(self):
         return f"{self.device_name}-({self.uuid})"
@@ -173,37 +176,56 @@ class Tag(models.Model):
         return f"{self._meta.db_table}--{self.tag, self.color, self.guid_id}"
 
 
-class ClientTags(models.Model):
+class PeerTag(models.Model):
     """
-    设备标签关联模型
+    设备标签成员关系模型（地址簿内每个 设备-标签 一行）
     """
 
-    user = models.ForeignKey(
-        User,
-        to_field="id",
-        on_delete=models.CASCADE,
-        verbose_name="用户名",
-        related_name="user_tags",
-        db_column="user_id_id",
-    )
-    peer_id = models.CharField(max_length=255, verbose_name="设备ID", db_index=True)
-    tags = models.JSONField(verbose_name="标签ID列表", default=list)
     guid = models.ForeignKey(
         Personal,
         to_field="guid",
         on_delete=models.CASCADE,
-        related_name="client_tags",
+        related_name="peer_tags",
         db_column="guid",
-        db_index=True,
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="peer_tags", verbose_name="标签")
+    peer_id = models.CharField(max_length=255, verbose_name="设备ID")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="peer_tags",
+        verbose_name="设置者",
     )
 
     class Meta:
-        verbose_name = "设备标签关联"
-        db_table = "client_tags"
-        unique_together = [["peer_id", "guid"]]
+        verbose_name = "设备标签成员"
+        db_table = "peer_tag"
+        # (guid, tag, peer_id) 唯一索引同时服务于 "带有某标签的设备" 查询与按标签删除
+        unique_together = [["guid", "tag", "peer_id"]]
+        indexes = [models.Index(fields=["guid", "peer_id"], name="peer_tag_guid_peer_idx")]
 
     def __str__(self):
-        return f"{self._meta.db_table}--{self.user_id, self.peer_id, self.tags, self.guid_id}"
+        return f"{self._meta.db_table}--{self.guid_id, self.tag_id, self.peer_id}"
+
+
+class UserTag(models.Model):
+    """
+    用户标签字典模型（标签名称 -> 该用户设置的设备标签数），随标签写入增量维护
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tag_dictionary", verbose_name="用户")
+    tag = models.CharField(max_length=255, verbose_name="标签名称")
+    count = models.IntegerField(default=0, verbose_name="使用次数")
+
+    class Meta:
+        verbose_name = "用户标签字典"
+        db_table = "user_tag"
+        unique_together = [["user", "tag"]]
+
+    def __str__(self):
+        return f"{self._meta.db_table}--{self.user_id, self.tag, self.count}"
 
 
 class Token(TimestampMixin):
@@ -235,7 +257,7 @@ class Token(TimestampMixin):
         choices=CLIENT_TYPE_CHOICES,
         default=CLIENT_TYPE_CLIENT,
     )
-    last_used_at = models.DateTimeField(auto_now=True, verbose_name="最后使用时间")
+    last_used_at = models.DateTimeField(auto_now=True, verbose_name="最后使用时间", db_index=True)
 
     class Meta:
         verbose_name = "令牌"
@@ -297,6 +319,7 @@ class LoginClient(models.Model):
         max_length=255, verbose_name="客户端名称", default="", blank=True
     )
     login_status = models.BooleanField(default=True, verbose_name="登录状态")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间", db_index=True)
 
     class Meta:
         verbose_name = "登录客户端"
@@ -763,3 +786,23 @@ class DeviceGroupPeer(models.Model):
 
     def __str__(self):
         return f"{self.device_group} - {self.peer}"
+
+
+class ResourceVersion(models.Model):
+    """
+    资源版本号
+
+    资源写入时递增，客户端列表接口据此生成 ETag，未变化的轮询直接返回 304。
+    """
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="资源名称")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="版本号")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        verbose_name = "资源版本号"
+        verbose_name_plural = verbose_name
+        db_table = "resource_version"
+
+    def __str__(self):
+        return f"{self.name}-{self.version}"
@@ -1,16 +1,24 @@
+import base64
+import csv
+import hashlib
+import io
 import json
 import logging
 import time
-from datetime import timedelta
-from typing import TypeVar
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import TypeVar, NamedTuple
 
 from django.contrib.auth.models import User, Group
+from django.contrib.sessions.models import Session
 from django.db import models
 from django.db import transaction, OperationalError
-from django.db.models import Q, Exists, OuterRef, F, Subquery
+from django.db.models import Q, Exists, OuterRef, F, Subquery, Case, When, Value, BooleanField, Count
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest
 from django.utils import timezone
 
+from apps.common.response import batched
 from apps.db.models import (
     HeartBeat,
     PeerInfo,
@@ -23,7 +31,8 @@ from apps.db.models import (
     UserProfile,
     Personal,
     Alias,
-    ClientTags,
+    PeerTag,
+    UserTag,
     PeerPersonal,
     ShareToUser,
     ShareToGroup,
@@ -34,9 +43,16 @@ from apps.db.models import (
     UserRole,
     DeviceGroupPeer,
     GroupRole,
+    ResourceVersion,
 )
+from apps.db.write_behind import heartbeat_buffer, token_activity_buffer
 from common.env import PublicConfig
+from common.generation import generations
 from common.error import UserNotFoundError
+from common.log_summary import get_summary, detail
+from common.lru import LRUCache
+from common.presence import presence
+from common.token_signer import token_signer
 from common.utils import get_local_time, get_randem_md5
 
 logger = logging.getLogger(__name__)
@@ -159,11 +175,14 @@ class UserService(BaseService):
             raise UserNotFoundError(email or username)
         user.set_password(password)
         user.save()
+        TokenService.invalidate_user(user)
         logger.info(f"设置用户密码: {user}")
         return user
 
     def delete_user(self, *usernames):
+        users = list(self.db.objects.filter(username__in=[*usernames]))
         self.db.objects.filter(username__in=[*usernames]).update(is_active=False)
+        TokenService.invalidate_user(*users)
         logger.info(f"删除用户: {usernames}")
 
     def __get_list(self, **kwargs):
@@ -209,6 +228,7 @@ class UserService(BaseService):
         for field, value in kwargs.items():
             setattr(user, field, value)
         user.save(update_fields=list(kwargs.keys()))
+        TokenService.invalidate_user(user)
         logger.info(f"更新用户信息: {username} - {list(kwargs.keys())}")
         return user
 
@@ -227,6 +247,7 @@ class UserService(BaseService):
             user.email = f'{user.email}_deleted_{timestamp}'
             update_fields.append('email')
         user.save(update_fields=update_fields)
+        TokenService.invalidate_user(user)
         logger.info(f"软删除用户: {username}")
         return True
 
@@ -324,6 +345,7 @@ class GroupService(BaseService):
         with transaction.atomic():
             UserProfile.objects.filter(group=group).update(group=default)
             group.delete()
+            PermissionService.invalidate()
         logger.info(f"删除用户组: id={group_id}, name={group.name}")
         return True
 
@@ -426,6 +448,8 @@ class GroupService(BaseService):
                 UserProfile.objects.bulk_update(to_update, ["group"])
             if to_create:
                 UserProfile.objects.bulk_create(to_create)
+            if to_update or to_create:
+                PermissionService.invalidate()
 
 
 class PeerInfoService(BaseService):
@@ -437,18 +461,178 @@ class PeerInfoService(BaseService):
     def get_peer_info_by_peer_id(self, peer_id):
         return self.db.objects.filter(peer_id=peer_id).first()
 
-    def update(self, uuid: str, **kwargs):
+    # 进程内缓存 uuid -> (设备代数, (系统信息指纹, 上报时间戳))，相同内容的重复上报与心跳判断无需访问数据库；
+    # 删除设备时递增节点内共享的设备代数，各 worker 据此丢弃旧值
+    GENERATION_KEY = 'sysinfo'
+    _fingerprints = LRUCache(PublicConfig.SYSINFO_CACHE_SIZE, ttl=PublicConfig.SYSINFO_CACHE_TTL)
+    _summary = get_summary('设备信息', {'created': '新增', 'updated': '更新', 'refreshed': '过期刷新'})
+
+    @staticmethod
+    def sysinfo_fingerprint(data: dict) -> str:
+        """
+        计算系统信息指纹（归一化后取 sha256）
+
+        :param data: 系统信息字段
+        :return: 十六进制指纹
+        :rtype: str
+        """
+        normalized = {k: '' if v is None else str(v).strip() for k, v in data.items()}
+        raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _sysinfo_expired(uuid: str, sysinfo_at: float | None) -> bool:
+        """
+        判断系统信息是否过期；有效期按 uuid 叠加固定抖动（最多 10%），使各设备的重新上报时间错开
+
+        :param uuid: 设备UUID
+        :param sysinfo_at: 最近一次上报的时间戳
+        :rtype: bool
+        """
+        ttl = PublicConfig.SYSINFO_TTL
+        if ttl <= 0:
+            return False
+        if sysinfo_at is None:
+            return True
+        ttl += zlib.crc32(uuid.encode('utf-8')) % (ttl // 10 + 1)
+        return time.time() - sysinfo_at >= ttl
+
+    def needs_sysinfo(self, uuid: str) -> bool:
+        """
+        判断是否需要客户端重新上报系统信息（供心跳响应使用）
+
+        :param uuid: 设备UUID
+        :return: 设备未知或系统信息已过期时返回 True
+        :rtype: bool
+        """
+        generation = generations.get(self.GENERATION_KEY)
+        cached = self._get_fingerprint(uuid, generation)
+        if cached is None:
+            row = self.db.objects.filter(uuid=uuid).values_list('sysinfo_hash', 'sysinfo_at').first()
+            if row is None:
+                return True
+            fingerprint, sysinfo_at = row
+            cached = (fingerprint, sysinfo_at.timestamp() if sysinfo_at else None)
+            self._fingerprints.set(uuid, (generation, cached))
+        return self._sysinfo_expired(uuid, cached[1])
+
+    def _get_fingerprint(self, uuid: str, generation: int) -> tuple[str, float | None] | None:
+        """
+        读取当前设备代数下缓存的系统信息指纹，代数已变化（其他进程删除过设备）时视为未缓存
+
+        :param uuid: 设备UUID
+        :param generation: 查询数据库前读取的设备代数
+        :return: (系统信息指纹, 上报时间戳)
+        :rtype: tuple[str, float | None] | None
+        """
+        cached = self._fingerprints.get(uuid)
+        if cached is None or cached[0] != generation:
+            return None
+        return cached[1]
+
+    def update(self, uuid: str, **kwargs) -> bool:
+        """
+        更新设备系统信息：指纹未变化且未过期时直接返回，变化时仅写入变更字段
+
+        :param uuid: 设备UUID
+        :return: 是否写入了数据库
+        :rtype: bool
+        """
         kwargs["uuid"] = uuid
         peer_id = kwargs.get("peer_id")
+        fingerprint = self.sysinfo_fingerprint(kwargs)
+        generation = generations.get(self.GENERATION_KEY)
+        cached = self._get_fingerprint(uuid, generation)
+        if cached and cached[0] == fingerprint and not self._sysinfo_expired(uuid, cached[1]):
+            return False
 
-        if not self.db.objects.filter(Q(uuid=uuid) | Q(peer_id=peer_id)).update(**kwargs):
-            self.db.objects.create(**kwargs)
+        now = timezone.now()
+        peer = self.db.objects.filter(Q(uuid=uuid) | Q(peer_id=peer_id)).first()
+        if peer is None:
+            # 新增设备由 post_save 信号递增设备列表版本号
+            self.db.objects.create(sysinfo_hash=fingerprint, sysinfo_at=now, **kwargs)
+            self._summary.incr('created')
+            detail(logger, "新增设备信息: %s", kwargs)
+        elif peer.sysinfo_hash != fingerprint:
+            changed = {field: value for field, value in kwargs.items() if getattr(peer, field) != value}
+            changed["sysinfo_hash"] = fingerprint
+            self.db.objects.filter(pk=peer.pk).update(sysinfo_at=now, **changed)
+            self._summary.incr('updated')
+            detail(logger, "更新设备信息: uuid=%s, %s", uuid, changed)
+            ResourceVersionService().bump(ResourceVersionService.PEERS)
+        elif peer.sysinfo_at is None or self._sysinfo_expired(uuid, peer.sysinfo_at.timestamp()):
+            # 内容未变但已过期（心跳要求的重新上报），仅刷新上报时间
+            self.db.objects.filter(pk=peer.pk).update(sysinfo_at=now)
+            self._summary.incr('refreshed')
+        else:
+            self._fingerprints.set(uuid, (generation, (fingerprint, peer.sysinfo_at.timestamp())))
+            return False
 
-        logger.info(f"更新设备信息: {kwargs}")
+        self._fingerprints.set(uuid, (generation, (fingerprint, now.timestamp())))
+        return True
 
     def get_list(self):
         return self.db.objects.all()
 
+    def filter_peers(self, os_param: str = '', status: str = ''):
+        """
+        按操作系统与在线状态筛选设备（与 Web 设备列表的筛选一致），按创建时间倒序
+
+        :param os_param: 操作系统筛选（包含匹配）
+        :param status: 在线状态筛选（online/offline）
+        :rtype: QuerySet[PeerInfo]
+        """
+        qs = self.db.objects.order_by('-created_at', '-id')
+        if os_param:
+            qs = qs.filter(os__icontains=os_param)
+        if status in ('online', 'offline'):
+            qs = qs.annotate(
+                is_online=HeartBeatService().online_expression()
+            ).filter(is_online=(status == 'online'))
+        return qs
+
+    def get_list_with_group_name(self, qs=None):
+        """
+        查询设备列表并标注首个所属设备组名称（按组名排序），单条 SQL 完成
+
+        :param qs: 设备查询集（可已筛选、切片），默认全部设备
+        :return: 含 id、created_at、peer_id、device_name、os、username、note、device_group_name 的字典查询集
+        :rtype: QuerySet[dict]
+        """
+        if qs is None:
+            qs = self.db.objects.all()
+        first_group = DeviceGroupPeer.objects.filter(
+            peer_id=OuterRef('pk')
+        ).order_by('device_group__name').values('device_group__name')[:1]
+        return qs.annotate(
+            device_group_name=Coalesce(Subquery(first_group), Value('')),
+        ).values('id', 'created_at', 'peer_id', 'device_name', 'os', 'username', 'note', 'device_group_name')
+
+    @staticmethod
+    def encode_cursor(row: dict) -> str:
+        """
+        由一行设备数据生成键集分页游标
+
+        :param row: 含 created_at、id 的字典
+        :return: 形如 ``<创建时间微秒时间戳>_<id>``
+        :rtype: str
+        """
+        epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+        return f"{(row['created_at'] - epoch) // timedelta(microseconds=1)}_{row['id']}"
+
+    def after_cursor(self, qs, cursor: str):
+        """
+        键集分页：返回排在游标之后的设备（按 created_at、id 倒序）
+
+        :param qs: filter_peers 返回的查询集
+        :param cursor: encode_cursor 生成的游标
+        :rtype: QuerySet[PeerInfo]
+        :raises ValueError: 游标格式错误
+        """
+        micros, pk = (int(part) for part in cursor.split('_', 1))
+        created_at = datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=micros)
+        return qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
     def get_peers(self, *peers):
         return self.db.objects.filter(peer_id__in=peers).all()
 
@@ -473,26 +657,14 @@ class PeerInfoService(BaseService):
         :return: 标注后的查询集
         :rtype: QuerySet
         """
-        online_threshold = timezone.now() - timedelta(minutes=5)
-        recent_hb = HeartBeat.objects.filter(
-            Q(peer_id=OuterRef('peer_id')) | Q(uuid=OuterRef('uuid')),
-            modified_at__gte=online_threshold
-        ).values('pk')[:1]
-
         base_qs = self.db.objects.all().annotate(
-            is_online=Exists(recent_hb),
+            is_online=HeartBeatService().online_expression(),
             owner_username=F('username'),
             alias=Subquery(
                 Alias.objects.filter(
                     peer_id=OuterRef('peer_id')
                 ).values('alias')[:1]
             ),
-            tags_text=Subquery(
-                ClientTags.objects.filter(
-                    peer_id=OuterRef('peer_id'),
-                    user=user
-                ).values('tags')[:1]
-            )
         )
 
         sort_map = {
@@ -517,8 +689,8 @@ class PeerInfoService(BaseService):
         if enabled in ('enabled', 'disabled'):
             base_qs = base_qs.filter(is_enabled=(enabled == 'enabled'))
         if tags:
-            tag_peers = ClientTags.objects.filter(
-                user=user, tags__contains=tags
+            tag_peers = PeerTag.objects.filter(
+                user=user, tag__tag=tags
             ).values_list('peer_id', flat=True)
             base_qs = base_qs.filter(peer_id__in=tag_peers)
 
@@ -538,9 +710,15 @@ class PeerInfoService(BaseService):
         with transaction.atomic():
             HeartBeat.objects.filter(peer_id__in=peer_ids).delete()
             Alias.objects.filter(peer_id__peer_id__in=peer_ids).delete()
-            ClientTags.objects.filter(peer_id__in=peer_ids).delete()
+            UserTagService().remove_members(PeerTag.objects.filter(peer_id__in=peer_ids))
             PeerPersonal.objects.filter(peer__peer_id__in=peer_ids).delete()
+            uuids = list(self.db.objects.filter(peer_id__in=peer_ids).values_list('uuid', flat=True))
             count, _ = self.db.objects.filter(peer_id__in=peer_ids).delete()
+            # 提交后递增共享的设备代数，使其他 worker 中被删除设备的指纹缓存失效；
+            # 设备列表版本号由 post_delete 信号在提交后递增
+            transaction.on_commit(lambda: generations.bump(self.GENERATION_KEY))
+        for uuid in uuids:
+            self._fingerprints.pop(uuid)
         logger.info(f"批量删除设备: {peer_ids}, 共删除 {count} 台")
         return count
 
@@ -570,6 +748,8 @@ class PeerInfoService(BaseService):
         :rtype: bool
         """
         count = self.db.objects.filter(peer_id=peer_id).update(note=note)
+        if count:
+            ResourceVersionService().bump(ResourceVersionService.PEERS)
         return count > 0
 
     def get_all_tags_for_user(self, user) -> list[str]:
@@ -580,20 +760,7 @@ class PeerInfoService(BaseService):
         :return: 标签名称列表
         :rtype: list[str]
         """
-        tag_rows = ClientTags.objects.filter(user=user).values_list('tags', flat=True)
-        all_tags = set()
-        for raw in tag_rows:
-            if isinstance(raw, str):
-                for t in raw.split(','):
-                    t = t.strip()
-                    if t:
-                        all_tags.add(t)
-            elif isinstance(raw, list):
-                for t in raw:
-                    t = str(t).strip()
-                    if t:
-                        all_tags.add(t)
-        return sorted(all_tags)
+        return [tag for tag, _ in UserTagService().get_tag_counts(user)]
 
 
 class HeartBeatService(BaseService):
@@ -601,25 +768,73 @@ class HeartBeatService(BaseService):
 
     MAX_RETRIES = 3
     RETRY_BACKOFF = 0.15
+    # 共享在线状态表中在线设备超过该数量时，列表标注回退为 SQL 子查询
+    PRESENCE_IN_LIMIT = 5000
+
+    # 进程内记录每台设备最后一次落库的时间与版本号，用于跳过冗余的心跳写入
+    _last_write = LRUCache(PublicConfig.HEARTBEAT_LAST_WRITE_CACHE_SIZE)
+    _summary = get_summary('心跳', {'written': '写入', 'skipped': '跳过', 'created': '新设备', 'lock_retry': '锁重试'})
+
+    @classmethod
+    def write_stats(cls) -> dict:
+        """
+        获取本进程心跳落库与跳过的累计次数
+
+        :return: 形如 {"written": N, "skipped": M}
+        :rtype: dict
+        """
+        totals = cls._summary.totals()
+        return {'written': totals.get('written', 0), 'skipped': totals.get('skipped', 0)}
+
+    @classmethod
+    def _count(cls, name) -> None:
+        cls._summary.incr(name)
+
+    def _is_redundant(self, key, ver, now) -> bool:
+        # 落库时间最多滞后一个粒度，限制在在线阈值的 1/3 以内，为客户端心跳间隔留出余量
+        granularity = min(PublicConfig.HEARTBEAT_WRITE_GRANULARITY, PublicConfig.ONLINE_TIMEOUT // 3)
+        if granularity <= 0:
+            return False
+        last = self._last_write.get(key)
+        return last is not None and last[1] == ver and now - last[0] < granularity
 
     def update(self, uuid, **kwargs):
         kwargs["modified_at"] = get_local_time()
         kwargs["uuid"] = uuid
         peer_id = kwargs.get("peer_id")
 
+        if presence.enabled:
+            presence.touch(peer_id)
+
+        key = (uuid, peer_id)
+        now = time.monotonic()
+        if self._is_redundant(key, kwargs.get("ver"), now):
+            self._count('skipped')
+            return
+
+        if PublicConfig.HEARTBEAT_WRITE_BEHIND:
+            heartbeat_buffer.record(uuid, peer_id, kwargs["modified_at"], kwargs.get("ver"))
+            self._last_write.set(key, (now, kwargs.get("ver")))
+            self._count('written')
+            return
+
         last_exc = None
         for attempt in range(1, self.MAX_RETRIES + 1):
             try:
                 with transaction.atomic():
                     if not self.db.objects.filter(Q(uuid=uuid) | Q(peer_id=peer_id)).update(**kwargs):
                         self.db.objects.create(**kwargs)
+                        self._count('created')
+                self._last_write.set(key, (now, kwargs.get("ver")))
+                self._count('written')
                 return
             except OperationalError as e:
                 last_exc = e
                 if "locked" not in str(e).lower():
                     raise
                 wait = self.RETRY_BACKOFF * (2 ** (attempt - 1))
-                logger.warning(f"心跳写入被锁，第{attempt}次重试 (等待{wait:.2f}s): uuid={uuid}")
+                self._count('lock_retry')
+                detail(logger, "心跳写入被锁，第%s次重试 (等待%.2fs): uuid=%s", attempt, wait, uuid)
                 time.sleep(wait)
 
         logger.error(f"心跳写入最终失败 ({self.MAX_RETRIES}次重试): uuid={uuid}, error={last_exc}")
@@ -631,16 +846,32 @@ class HeartBeatService(BaseService):
             return True
         return False
 
-    def is_online(self, peer_id, uuid=None, timeout_minutes=5) -> bool:
-        threshold = timezone.now() - timedelta(minutes=timeout_minutes)
+    def is_online(self, peer_id, uuid=None, timeout_seconds=None) -> bool:
+        if timeout_seconds is None:
+            timeout_seconds = PublicConfig.ONLINE_TIMEOUT
+        if presence.enabled:
+            return presence.is_online(peer_id, timeout=timeout_seconds)
+        threshold = timezone.now() - timedelta(seconds=timeout_seconds)
         q_filter = Q(peer_id=peer_id)
         if uuid:
             q_filter |= Q(uuid=uuid)
         return self.db.objects.filter(q_filter, modified_at__gte=threshold).exists()
 
-    def get_online_peer_ids(self, peer_ids, timeout_seconds=60) -> set:
+    def get_online_peer_ids(self, peer_ids, timeout_seconds=None) -> set:
+        """
+        批量判断在线状态（共享在线状态表读取一次，或一次 heartbeat 查询）
+
+        :param peer_ids: 设备ID列表
+        :param timeout_seconds: 在线阈值（秒），默认 ``ONLINE_TIMEOUT``
+        :return: 在线的设备ID集合
+        :rtype: set
+        """
         if not peer_ids:
             return set()
+        if timeout_seconds is None:
+            timeout_seconds = PublicConfig.ONLINE_TIMEOUT
+        if presence.enabled:
+            return presence.online_peer_ids(peer_ids, timeout=timeout_seconds)
         threshold = timezone.now() - timedelta(seconds=timeout_seconds)
         online_qs = self.db.objects.filter(
             peer_id__in=peer_ids,
@@ -648,6 +879,36 @@ class HeartBeatService(BaseService):
         ).values_list('peer_id', flat=True).distinct()
         return set(online_qs)
 
+    def online_expression(self, timeout_seconds=None, prefix: str = ''):
+        """
+        构建 PeerInfo 查询集的在线状态标注表达式
+
+        开启共享在线状态表时，先从共享内存取出在线设备ID，再以 ``CASE WHEN peer_id IN (...)`` 标注；
+        在线设备过多或未开启时，回退为对 heartbeat 表的 ``EXISTS`` 子查询。
+
+        :param timeout_seconds: 在线阈值（秒），默认 ``ONLINE_TIMEOUT``
+        :param prefix: 设备字段的关联路径前缀，如对 PeerPersonal 查询集标注时传 ``'peer__'``
+        :return: 可用于 ``annotate`` 的布尔表达式
+        """
+        if timeout_seconds is None:
+            timeout_seconds = PublicConfig.ONLINE_TIMEOUT
+        if presence.enabled:
+            online_ids = presence.online_peer_ids(timeout=timeout_seconds)
+            if not online_ids:
+                return Value(False, output_field=BooleanField())
+            if len(online_ids) <= self.PRESENCE_IN_LIMIT:
+                return Case(
+                    When(**{f'{prefix}peer_id__in': online_ids}, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+        threshold = timezone.now() - timedelta(seconds=timeout_seconds)
+        recent_hb = self.db.objects.filter(
+            Q(peer_id=OuterRef(f'{prefix}peer_id')) | Q(uuid=OuterRef(f'{prefix}uuid')),
+            modified_at__gte=threshold
+        ).values('pk')[:1]
+        return Exists(recent_hb)
+
 
 class LoginClientService(BaseService):
     """
@@ -684,6 +945,7 @@ class LoginClientService(BaseService):
                 client_type=client_type_val,
                 platform=platform_val,
                 client_name=client_name,
+                updated_at=timezone.now(),
         ):
             self.db.objects.create(
                 user=user_qs,
@@ -704,6 +966,7 @@ class LoginClientService(BaseService):
                 uuid=uuid,
                 peer_id=peer_id,
                 login_status=False,
+                updated_at=timezone.now(),
         ):
             login_qs = self.db.objects.filter(
                 user=user_qs,
@@ -726,6 +989,17 @@ class LoginClientService(BaseService):
         return self.db.objects.filter(user_id=self.get_user_info(username).id).all()
 
 
+class TokenEntry(NamedTuple):
+    """
+    令牌解析结果
+    """
+
+    user: User
+    uuid: str
+    last_used_at: object
+    peer: PeerInfo | None
+
+
 class TokenService(BaseService):
     """
     令牌服务类
@@ -733,9 +1007,201 @@ class TokenService(BaseService):
 
     db = Token
 
+    # 进程内令牌解析缓存 token -> (令牌代数, TokenEntry)；令牌撤销时递增该令牌所在分桶的共享代数，
+    # 各 worker 据此丢弃旧值，TTL 作为兜底
+    _cache = LRUCache(PublicConfig.TOKEN_CACHE_SIZE, ttl=PublicConfig.TOKEN_CACHE_TTL)
+    # 令牌与用户分别按哈希分桶记录共享代数：登录、登出只使同桶的少量缓存失效，且占用的共享槽位数量固定
+    GENERATION_BUCKETS = 512
+    # 设备UUID -> (令牌, 最后使用时间)，未登录设备记为空元组，心跳续期无需查库
+    _uuid_tokens = LRUCache(PublicConfig.TOKEN_CACHE_SIZE, ttl=PublicConfig.TOKEN_CACHE_TTL)
+    # 令牌 -> 内存中的最后使用时间（尚未落库的滑动过期），优先于数据库中的值
+    _activity = LRUCache(PublicConfig.TOKEN_CACHE_SIZE)
+    _summary = get_summary('令牌', {'created': '创建', 'replaced': '更新', 'renewed': '心跳续期'})
+    # 签名令牌模式：用户ID -> (用户代数, (用户, 撤销代数))，按该用户所在分桶的共享代数失效
+    _generations = LRUCache(PublicConfig.TOKEN_CACHE_SIZE, ttl=PublicConfig.TOKEN_CACHE_TTL)
+    GENERATION_CONFIG = 'token_generation'
+
     def __init__(self, request: HttpRequest | None = None):
         self.request = request
 
+    @classmethod
+    def _token_generation_key(cls, token) -> str:
+        return f'token:{zlib.crc32(str(token).encode("utf-8")) % cls.GENERATION_BUCKETS}'
+
+    @classmethod
+    def _user_generation_key(cls, user_id) -> str:
+        return f'token_user:{zlib.crc32(str(user_id).encode("utf-8")) % cls.GENERATION_BUCKETS}'
+
+    def resolve(self, token) -> TokenEntry | None:
+        """
+        解析令牌，一次得到用户、设备UUID、最后使用时间与设备信息（带缓存）
+
+        :param token: 令牌
+        :return: 令牌不存在或用户已停用时返回 None
+        :rtype: TokenEntry | None
+        """
+        if not token:
+            return None
+        # 先读取代数再查库：查库期间发生的撤销会使本次缓存的值失效
+        generation = generations.get(self._token_generation_key(token))
+        cached = self._cache.get(token)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        if PublicConfig.TOKEN_MODE == 'signed' and (entry := self._resolve_signed(token)):
+            return entry
+        token_obj = self.db.objects.select_related('user').filter(token=token, user__is_active=True).first()
+        if token_obj is None:
+            return None
+        peer = PeerInfo.objects.filter(uuid=token_obj.uuid).first()
+        entry = TokenEntry(token_obj.user, token_obj.uuid, token_obj.last_used_at, peer)
+        self._cache.set(token, (generation, entry))
+        return entry
+
+    def _resolve_signed(self, token) -> TokenEntry | None:
+        """
+        纯计算校验签名令牌：签名有效、签发时间在 ``TOKEN_TIMEOUT`` 内且撤销代数一致时直接通过；
+        否则返回 None，由调用方回退到数据库中的令牌记录（滑动过期）
+
+        :param token: 令牌
+        :rtype: TokenEntry | None
+        """
+        payload = token_signer.loads(token)
+        if payload is None:
+            return None
+        issued_at = payload.get('i', 0)
+        if time.time() - issued_at >= PublicConfig.TOKEN_TIMEOUT:
+            return None
+        state = self._user_generation(payload.get('u'))
+        if state is None:
+            return None
+        user, generations = state
+        uuid = payload.get('d')
+        if payload.get('g') != [generations.get('*', 0), generations.get(uuid, 0)]:
+            return None
+        last_used_at = datetime.fromtimestamp(issued_at, tz=dt_timezone.utc)
+        return TokenEntry(user, uuid, last_used_at, None)
+
+    def _user_generation(self, user_id) -> tuple[User, dict] | None:
+        """
+        获取用户及其令牌撤销代数（带缓存）
+
+        撤销代数以 JSON 存于用户配置：``{"*": 用户级代数, "<uuid>": 设备级代数}``
+
+        :param user_id: 用户ID
+        :return: 用户不存在或已停用时返回 None
+        """
+        generation = generations.get(self._user_generation_key(user_id))
+        cached = self._generations.get(user_id)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            return None
+        raw = UserConfig.objects.filter(
+            user=user, config_name=self.GENERATION_CONFIG
+        ).values_list('config_value', flat=True).first()
+        state = (user, json.loads(raw) if raw else {})
+        self._generations.set(user_id, (generation, state))
+        return state
+
+    @classmethod
+    def bump_generation(cls, user_id, uuid=None) -> None:
+        """
+        递增撤销代数，使已签发的签名令牌不再通过纯计算校验（仅签名令牌模式）；
+        事务提交后递增该用户的共享代数，所有进程重新读取该用户的撤销代数
+
+        :param user_id: 用户ID
+        :param uuid: 设备UUID，为空时作废该用户全部设备的签名令牌
+        """
+        if PublicConfig.TOKEN_MODE != 'signed':
+            return
+        with transaction.atomic():
+            conf, _ = UserConfig.objects.select_for_update().get_or_create(
+                user_id=user_id, config_name=cls.GENERATION_CONFIG, defaults={'config_value': '{}'}
+            )
+            generations = json.loads(conf.config_value or '{}')
+            key = uuid or '*'
+            generations[key] = generations.get(key, 0) + 1
+            conf.config_value = json.dumps(generations)
+            conf.save(update_fields=['config_value'])
+            cls._bump_shared_generation(cls._user_generation_key(user_id))
+        cls._generations.pop(user_id)
+
+    def _signed_token(self, user: User, uuid) -> str | None:
+        state = self._user_generation(user.id)
+        if state is None:
+            return None
+        generations = state[1]
+        token = token_signer.dumps({
+            'u': user.id,
+            'd': uuid,
+            'g': [generations.get('*', 0), generations.get(uuid, 0)],
+            'i': int(time.time()),
+        })
+        # 超出字段长度（设备UUID过长）时退回普通令牌
+        return token if len(token) <= self.db._meta.get_field('token').max_length else None
+
+    @classmethod
+    def invalidate(cls, *tokens) -> None:
+        """
+        使令牌解析缓存失效：本进程立即失效，其他进程在事务提交后随令牌所在分桶的代数递增失效
+
+        :param tokens: 令牌
+        """
+        for token in tokens:
+            cls._cache.pop(token)
+            cls._activity.pop(token)
+        cls._bump_shared_generation(*(cls._token_generation_key(token) for token in tokens))
+
+    @staticmethod
+    def _bump_shared_generation(*keys: str) -> None:
+        for key in set(keys):
+            transaction.on_commit(lambda key=key: generations.bump(key))
+
+    @classmethod
+    def _invalidate_qs(cls, qs, revoke=False) -> None:
+        devices = set()
+        for token, uuid, user_id in qs.values_list('token', 'uuid', 'user_id'):
+            cls.invalidate(token)
+            cls._uuid_tokens.pop(uuid)
+            devices.add((user_id, uuid))
+        if revoke:
+            for user_id, uuid in devices:
+                cls.bump_generation(user_id, uuid)
+
+    @classmethod
+    def invalidate_user(cls, *users: User) -> None:
+        """
+        使用户的全部令牌解析缓存失效（修改密码、停用等用户变更后调用）
+
+        :param users: 用户
+        """
+        cls._invalidate_qs(cls.db.objects.filter(user__in=users))
+        for user in users:
+            cls._generations.pop(user.id)
+        cls._bump_shared_generation(*(cls._user_generation_key(user.id) for user in users))
+
+    def last_used_at(self, token, stored):
+        """
+        获取令牌的最后使用时间：内存中尚未落库的值优先
+
+        :param token: 令牌
+        :param stored: 数据库中的最后使用时间
+        """
+        recent = self._activity.get(token)
+        return recent if recent is not None and recent > stored else stored
+
+    def touch(self, token, now=None) -> None:
+        """
+        记录令牌活跃：立即更新内存值，由写后缓冲按间隔批量落库
+
+        :param token: 令牌
+        :param now: 使用时间，默认当前时间
+        """
+        now = now or get_local_time()
+        self._activity.set(token, now)
+        token_activity_buffer.record(token, now)
+
     def create_token(self, username, uuid, client_type=Token.CLIENT_TYPE_API):
         """
         创建令牌
@@ -747,33 +1213,40 @@ class TokenService(BaseService):
         """
         assert client_type in [Token.CLIENT_TYPE_WEB, Token.CLIENT_TYPE_CLIENT, Token.CLIENT_TYPE_API]
         user_qs = self.get_user_info(username)
-        token = f"{get_randem_md5()}_{username}"
 
-        qs, created = self.db.objects.update_or_create(
-            user=user_qs,
-            uuid=uuid,
-            defaults={
-                'token': token,
-                'client_type': client_type,
-                'created_at': get_local_time(),
-                'last_used_at': get_local_time(),
-            },
-        )
-        logger.info(f"{'创建' if created else '更新'}令牌: user: {username} uuid: {uuid} token: {token}")
+        # 同一设备重新登录：作废旧令牌（事务提交后其他进程的缓存随代数失效）
+        with transaction.atomic():
+            self._invalidate_qs(self.db.objects.filter(user=user_qs, uuid=uuid), revoke=True)
+            self._uuid_tokens.pop(uuid)
+            token = None
+            if PublicConfig.TOKEN_MODE == 'signed':
+                token = self._signed_token(user_qs, uuid)
+            token = token or f"{get_randem_md5()}_{username}"
+            qs, created = self.db.objects.update_or_create(
+                user=user_qs,
+                uuid=uuid,
+                defaults={
+                    'token': token,
+                    'client_type': client_type,
+                    'created_at': get_local_time(),
+                    'last_used_at': get_local_time(),
+                },
+            )
+        self._summary.incr('created' if created else 'replaced')
+        detail(logger, "%s令牌: user: %s uuid: %s", '创建' if created else '更新', username, uuid)
         return token
 
     def check_token(self, token, timeout=None):
         if timeout is None:
             timeout = PublicConfig.TOKEN_TIMEOUT
-        if _token := self.db.objects.filter(token=token).first():
-            return _token.last_used_at > get_local_time() - timedelta(seconds=timeout)
-        self.db.objects.filter(token=token).delete()
+        if entry := self.resolve(token):
+            last_used_at = self.last_used_at(token, entry.last_used_at)
+            return last_used_at > get_local_time() - timedelta(seconds=timeout)
         return False
 
     def update_token(self, token):
-        if _token := self.db.objects.filter(token=token).first():
-            _token.last_used_at = get_local_time()
-            _token.save()
+        if entry := self.resolve(token):
+            self.touch(token)
             return True
         return False
 
@@ -791,32 +1264,45 @@ class TokenService(BaseService):
         """
         if timeout is None:
             timeout = PublicConfig.TOKEN_TIMEOUT
-        token_obj = self.db.objects.filter(uuid=uuid).first()
-        if not token_obj:
+        ref = self._uuid_tokens.get(uuid)
+        if ref is None:
+            ref = self.db.objects.filter(uuid=uuid).values_list('token', 'last_used_at').first() or ()
+            self._uuid_tokens.set(uuid, ref)
+        if not ref:
             return False
+        token, stored = ref
+        last_used_at = self.last_used_at(token, stored)
         now = get_local_time()
-        if token_obj.last_used_at < now - timedelta(seconds=timeout):
+        if last_used_at < now - timedelta(seconds=timeout):
             return False
-        if token_obj.last_used_at > now - timedelta(seconds=min_interval):
+        if last_used_at > now - timedelta(seconds=min_interval):
             return False
-        token_obj.last_used_at = now
-        token_obj.save(update_fields=['last_used_at'])
-        logger.info(f"心跳续期令牌: uuid={uuid}")
+        self.touch(token, now)
+        self._summary.incr('renewed')
+        detail(logger, "心跳续期令牌: uuid=%s", uuid)
         return True
 
     def delete_token(self, token):
-        res = self.db.objects.filter(token=token).delete()
+        with transaction.atomic():
+            self._invalidate_qs(self.db.objects.filter(token=token), revoke=True)
+            res = self.db.objects.filter(token=token).delete()
         logger.info(f"删除令牌: {token}")
         return res
 
     def delete_token_by_uuid(self, uuid):
-        res = self.db.objects.filter(uuid=uuid).delete()
+        with transaction.atomic():
+            self._invalidate_qs(self.db.objects.filter(uuid=uuid), revoke=True)
+            self._uuid_tokens.pop(uuid)
+            res = self.db.objects.filter(uuid=uuid).delete()
         logger.info(f"通过uuid删除令牌: {uuid}")
         return res
 
     def delete_token_by_user(self, username: User | str):
         user = self.get_user_info(username)
-        res = self.db.objects.filter(user_id=user.id).delete()
+        with transaction.atomic():
+            self.invalidate_user(user)
+            self.bump_generation(user.id)
+            res = self.db.objects.filter(user_id=user.id).delete()
         logger.info(f"通过用户名删除令牌: {username}")
         return res
 
@@ -830,6 +1316,8 @@ class TokenService(BaseService):
     def user_info(self) -> User | None:
         if self.request:
             auth = self.authorization
+            if entry := self.resolve(auth):
+                return entry.user
             username = auth.split("_")[-1]
             return UserService().get_user_by_name(username)
         return None
@@ -869,7 +1357,10 @@ class TagService:
 
     db_tag = Tag
     db_client = PeerInfo
-    db_client_tags = ClientTags
+    db_peer_tag = PeerTag
+
+    # 按名称自动创建的标签使用的颜色（ARGB 整数，0xFF9E9E9E）
+    DEFAULT_COLOR = '4288585374'
 
     def __init__(self, guid, user: User | str):
         self.guid = guid
@@ -885,31 +1376,24 @@ class TagService:
 
     def create_tag(self, tag, color):
         res = self.db_tag.objects.create(tag=tag, color=color, guid_id=self.guid)
+        ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
         logger.info(f"创建标签: {self.guid} - {tag} - {color}")
         return res
 
     def delete_tag(self, *tag):
         """
-        删除指定标签，并在关系表中移除这些标签（单次批量更新）。
+        删除指定标签，成员关系行随标签级联删除（按标签 ID 索引删除，不扫描地址簿的关联行）
         """
         tags_to_delete = {str(t) for t in tag if t is not None}
         if not tags_to_delete:
             return
 
-        changed_instances = []
-        for inst in self.db_client_tags.objects.filter(guid_id=self.guid).all():
-            current_tags = self._parse_tags(inst.tags)
-            if not current_tags:
-                continue
-            new_tags = [t for t in current_tags if t not in tags_to_delete]
-            if new_tags != current_tags:
-                inst.tags = new_tags
-                changed_instances.append(inst)
-
-        if changed_instances:
-            self.db_client_tags.objects.bulk_update(changed_instances, ["tags"])
-
-        self.db_tag.objects.filter(tag__in=tags_to_delete, guid_id=self.guid).delete()
+        with transaction.atomic():
+            UserTagService().remove_members(
+                self.db_peer_tag.objects.filter(guid_id=self.guid, tag__tag__in=tags_to_delete)
+            )
+            self.db_tag.objects.filter(tag__in=tags_to_delete, guid_id=self.guid).delete()
+        ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
         logger.info(f"删除标签: {self.guid} - {tags_to_delete}")
 
     def update_tag(self, tag, color=None, new_tag=None):
@@ -918,91 +1402,105 @@ class TagService:
             data["color"] = color
         if new_tag:
             data["tag"] = new_tag
-        res = self.db_tag.objects.filter(tag=tag, guid_id=self.guid).update(**data)
+        with transaction.atomic():
+            if new_tag and new_tag != tag:
+                UserTagService().rename_members(
+                    self.db_peer_tag.objects.filter(guid_id=self.guid, tag__tag=tag), tag, new_tag
+                )
+            res = self.db_tag.objects.filter(tag=tag, guid_id=self.guid).update(**data)
+        ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
         logger.info(f"更新标签: {self.guid} - {data}")
         return res
 
     def get_all_tags(self):
         return self.db_tag.objects.filter(guid_id=self.guid).all()
 
-    def set_user_tag_by_peer_id(self, peer_id, tags):
-        """
-        为指定设备设置标签（覆盖式）。
+    def set_user_tag_by_peer_id(self, peer_id, tags, create_missing=False):
         """
-        tag_list = []
-        for tag in self.get_tags_by_name(*list(tags)):
-            tag_list.append(tag.id)
-
-        if qs := self.user.user_tags.filter(peer_id=peer_id, guid_id=self.guid).first():
-            qs.tags = tag_list if tag_list else []
-            return qs.save()
+        为指定设备设置标签（覆盖式）：只删除移除的成员关系、只插入新增的成员关系
 
-        kwargs = {
-            "peer_id": peer_id,
-            "tags": tag_list,
-            "guid_id": self.guid,
-        }
-        res = self.user.user_tags.create(**kwargs)
-        logger.info(f"设置标签: {self.guid} - {peer_id} - {tag_list if tag_list else []}")
-        return res
+        :param peer_id: 设备ID
+        :param tags: 标签名称列表
+        :param create_missing: 是否在地址簿中创建不存在的标签（Web 端按名称编辑标签）
+        """
+        tags = list(tags)
+        with transaction.atomic():
+            if create_missing and tags:
+                existing_names = set(self.get_tags_by_name(*tags).values_list("tag", flat=True))
+                self.db_tag.objects.bulk_create(
+                    [
+                        self.db_tag(tag=name, color=self.DEFAULT_COLOR, guid_id=self.guid)
+                        for name in dict.fromkeys(tags)
+                        if name not in existing_names
+                    ],
+                    ignore_conflicts=True,
+                )
+            tag_names = dict(self.get_tags_by_name(*tags).values_list("id", "tag"))
+            tag_ids = set(tag_names)
+            members = self.db_peer_tag.objects.filter(guid_id=self.guid, peer_id=peer_id)
+            user_tag_service = UserTagService()
+            user_tag_service.remove_members(members.exclude(tag_id__in=tag_ids))
+            existing = set(members.values_list("tag_id", flat=True))
+            added = sorted(tag_ids - existing)
+            self.db_peer_tag.objects.bulk_create(
+                [
+                    self.db_peer_tag(guid_id=self.guid, tag_id=tag_id, peer_id=peer_id, user=self.user)
+                    for tag_id in added
+                ],
+                ignore_conflicts=True,
+            )
+            if self.user is not None:
+                user_tag_service.apply({(self.user.id, tag_names[tag_id]): 1 for tag_id in added})
+        ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
+        logger.info(f"设置标签: {self.guid} - {peer_id} - {sorted(tag_ids)}")
 
     def del_tag_by_peer_id(self, *peer_id):
-        res = self.user.user_tags.filter(peer_id__in=peer_id, guid_id=self.guid).delete()
+        res = UserTagService().remove_members(self.db_peer_tag.objects.filter(peer_id__in=peer_id, guid_id=self.guid))
+        ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
         logger.info(f"删除标签: {self.guid} - {peer_id}")
         return res
 
     def get_tags_by_peer_id(self, peer_id) -> list[str]:
-        row = self.user.user_tags.filter(peer_id=peer_id, guid_id=self.guid).values("tags").first()
-        if not row:
-            return []
-        return self._parse_tags(row.get("tags"))
+        return list(
+            self.db_peer_tag.objects.filter(guid_id=self.guid, peer_id=peer_id)
+            .order_by("tag_id")
+            .values_list("tag__tag", flat=True)
+        )
 
-    def get_tags_map(self, peer_ids: list[str]) -> dict[str, list[str]]:
+    def get_peer_ids_by_tag(self, *tag) -> list[str]:
         """
-        批量获取多个设备的标签映射，避免 N+1 查询。
+        获取带有指定标签（任意一个）的设备ID，走 (guid, tag, peer_id) 索引
+
+        :param tag: 标签名称
+        :return: 设备ID列表
+        :rtype: list[str]
         """
-        if not peer_ids:
-            return {}
-        rows = self.db_client_tags.objects.filter(guid_id=self.guid, peer_id__in=peer_ids).values("peer_id", "tags")
-        logger.debug(f"批量获取标签: {self.guid} peers: {peer_ids} result: {rows}")
-        result: dict[str, list[str]] = {}
-        for row in rows:
-            tags = self._parse_tags(row.get("tags") or [])
-            tags_qs = self.get_tags_by_id(*tags)
-            logger.debug(f"标签: {self.guid} peers: {row['peer_id']} tags: {tags} result: {tags_qs}")
-            if not tags_qs:
-                continue
-            result[row["peer_id"]] = [str(tag.tag) for tag in tags_qs]
-        logger.debug(f"批量获取标签结果: guid: {self.guid} peers: {peer_ids} result: {result}")
-        return result
+        return list(
+            self.db_peer_tag.objects.filter(guid_id=self.guid, tag__tag__in=tag, tag__guid_id=self.guid)
+            .values_list("peer_id", flat=True)
+            .distinct()
+        )
 
-    @staticmethod
-    def _parse_tags(raw) -> list[str]:
+    def get_tags_map(self, peer_ids: list[str] | None = None) -> dict[str, list[str]]:
         """
-        解析存储在数据库中的标签字段。
-        兼容 JSONField 原生 list 和旧的字符串存储格式。
+        批量获取多个设备的标签映射：一次联表查询成员关系与标签名称
+
+        :param peer_ids: 设备ID列表，为 None 时获取整个地址簿
+        :return: 设备ID -> 标签名称列表（按标签 ID 排序，无标签的设备不出现）
+        :rtype: dict[str, list[str]]
         """
-        if raw is None:
-            return []
-        if isinstance(raw, list):
-            return [str(x) for x in raw]
-        s = str(raw).strip()
-        if not s:
-            return []
-        try:
-            val = json.loads(s)
-            if isinstance(val, list):
-                return [str(x) for x in val]
-        except Exception:
-            pass
-        import ast
-        try:
-            val = ast.literal_eval(s)
-            if isinstance(val, list):
-                return [str(x) for x in val]
-        except Exception:
-            pass
-        return []
+        if peer_ids is not None and not peer_ids:
+            return {}
+        rows = self.db_peer_tag.objects.filter(guid_id=self.guid)
+        if peer_ids is not None:
+            rows = rows.filter(peer_id__in=peer_ids)
+        rows = rows.order_by("tag_id").values_list("peer_id", "tag__tag")
+        result: dict[str, list[str]] = {}
+        for peer_id, name in rows:
+            result.setdefault(peer_id, []).append(str(name))
+        logger.debug(f"批量获取标签: guid: {self.guid} peers: {'all' if peer_ids is None else len(peer_ids)} "
+                     f"tagged: {len(result)}")
+        return result
 
 
 class LogService(BaseService):
@@ -1180,7 +1678,11 @@ class PersonalService(BaseService):
         personal = self.get_personal(guid=guid)
         if personal and personal.personal_type != "private":
             logger.info(f'删除地址簿: {personal.personal_name} - {personal.personal_name}')
-            return personal.delete()
+            with transaction.atomic():
+                UserTagService().remove_members(PeerTag.objects.filter(guid_id=guid))
+                res = personal.delete()
+            ResourceVersionService().bump(ResourceVersionService.ab_key(guid))
+            return res
         logger.info(f'无地址簿信息: {guid}')
         return None
 
@@ -1238,7 +1740,9 @@ class PersonalService(BaseService):
 
     def add_peer_to_personal(self, guid, peer_id):
         peer = PeerInfoService().get_peer_info_by_peer_id(peer_id)
-        return self.get_personal(guid=guid).personal_peer.create(peer=peer)
+        res = self.get_personal(guid=guid).personal_peer.create(peer=peer)
+        ResourceVersionService().bump(ResourceVersionService.ab_key(guid))
+        return res
 
     def del_peer_to_personal(self, guid, peer_id: list | str, user):
         if isinstance(peer_id, str):
@@ -1251,6 +1755,7 @@ class PersonalService(BaseService):
         tag_service = TagService(guid=guid, user=user)
         tag_service.del_tag_by_peer_id(*peer_id)
         res = self.get_personal(guid=guid).personal_peer.filter(peer__in=peers).delete()
+        ResourceVersionService().bump(ResourceVersionService.ab_key(guid))
         logger.info(f'从地址簿移除设备: guid={guid}, peer_ids={peer_id}')
         return res
 
@@ -1267,11 +1772,23 @@ class AliasService(BaseService):
         updated = self.db.objects.filter(peer_id_id=peer_id, guid_id=guid).update(**kwargs)
         if not updated:
             self.db.objects.create(**kwargs)
+        ResourceVersionService().bump(ResourceVersionService.ab_key(guid))
         logger.info(f'设置别名: peer_id="{peer_id}", alias="{alias}", guid="{guid}"')
 
     def get_alias(self, guid):
         return self.db.objects.filter(guid=guid).all()
 
+    def alias_expression(self, guid: str, peer_id_ref: str = 'peer_id'):
+        """
+        构建设备在指定地址簿中别名的标注表达式（相关子查询，无别名时为空字符串）
+
+        :param guid: 地址簿 GUID
+        :param peer_id_ref: 外层查询集中设备ID的字段路径
+        :return: 可用于 ``annotate`` 的字符串表达式
+        """
+        alias = self.db.objects.filter(guid=guid, peer_id=OuterRef(peer_id_ref)).values('alias')[:1]
+        return Coalesce(Subquery(alias), Value(''))
+
     def get_alias_map(self, guid: str, peer_ids: list[str]) -> dict[str, str]:
         if not peer_ids:
             return {}
@@ -1279,7 +1796,9 @@ class AliasService(BaseService):
         return {row["peer_id"]: row["alias"] for row in rows}
 
     def delete_alias(self, *peer_ids, guid):
-        return self.db.objects.filter(guid=guid, peer_id__in=peer_ids).delete()
+        res = self.db.objects.filter(guid=guid, peer_id__in=peer_ids).delete()
+        ResourceVersionService().bump(ResourceVersionService.ab_key(guid))
+        return res
 
     def count_by_personal(self, personal) -> int:
         return self.db.objects.filter(guid=personal).count()
@@ -1302,46 +1821,371 @@ class AliasService(BaseService):
             guid=personal,
             defaults={'alias': alias_text}
         )
+        ResourceVersionService().bump(ResourceVersionService.ab_key(personal))
 
     def delete_alias_by_peer_and_personal(self, peer, personal) -> None:
         self.db.objects.filter(peer_id=peer, guid=personal).delete()
+        ResourceVersionService().bump(ResourceVersionService.ab_key(personal))
 
 
 class ClientTagsService(BaseService):
     """
     设备标签关联服务类（面向 Web 视图的轻量标签操作）
+
+    Web 端以逗号分隔的标签名称读写，存储与客户端接口相同：地址簿内的 Tag 与 PeerTag 成员关系，
+    不存在的标签名称在该地址簿中自动创建。
     """
-    db = ClientTags
+    db = PeerTag
+
+    @staticmethod
+    def split_tags(tags) -> list[str]:
+        """
+        归一化标签名称：逗号分隔的文本或名称列表，去空白、去重，保持顺序
+
+        :param tags: 标签文本或名称列表
+        :rtype: list[str]
+        """
+        parts = tags.split(',') if isinstance(tags, str) else (tags or [])
+        return list(dict.fromkeys(p for p in (str(t).strip() for t in parts) if p))
 
     def get_tags_text_by_peer_in_personal(self, peer_id, guid) -> str:
-        obj = self.db.objects.filter(peer_id=peer_id, guid_id=guid).first()
-        return obj.tags if obj else ''
+        return ', '.join(
+            self.db.objects.filter(peer_id=peer_id, guid_id=guid)
+            .order_by('tag_id')
+            .values_list('tag__tag', flat=True)
+        )
 
     def set_tags_for_peer_in_personal(self, user, peer_id, guid, tags_text) -> None:
-        self.db.objects.filter(peer_id=peer_id, guid_id=guid).delete()
-        if tags_text:
-            self.db.objects.create(
-                user=user,
-                peer_id=peer_id,
-                tags=tags_text,
-                guid_id=guid
-            )
+        TagService(guid=guid, user=user).set_user_tag_by_peer_id(
+            peer_id=peer_id, tags=self.split_tags(tags_text), create_missing=True
+        )
 
     def get_user_peer_tags(self, user, peer_id) -> list:
         return list(
-            self.db.objects.filter(user=user, peer_id=peer_id).values_list('tags', flat=True)
+            self.db.objects.filter(user=user, peer_id=peer_id)
+            .order_by('tag_id')
+            .values_list('tag__tag', flat=True)
+            .distinct()
         )
 
     def update_or_create_client_tag(self, user, peer_id, personal, tags) -> None:
-        self.db.objects.update_or_create(
-            user=user,
-            peer_id=peer_id,
-            guid=personal,
-            defaults={'tags': tags}
-        )
+        self.set_tags_for_peer_in_personal(user, peer_id, personal.guid, tags)
 
     def delete_client_tag(self, user, peer_id, personal) -> None:
-        self.db.objects.filter(user=user, peer_id=peer_id, guid=personal).delete()
+        UserTagService().remove_members(self.db.objects.filter(peer_id=peer_id, guid=personal))
+        ResourceVersionService().bump(ResourceVersionService.ab_key(personal))
+
+
+class UserTagService(BaseService):
+    """
+    用户标签字典服务类
+
+    字典按 (用户, 标签名称) 记录该用户设置的设备标签成员关系数量，由标签成员关系的写入方增量维护，
+    标签下拉框读取时只需一次按用户的索引查询，无需扫描成员关系。
+    """
+    db = UserTag
+
+    def get_tag_counts(self, user) -> list[tuple[str, int]]:
+        """
+        获取用户的标签名称及使用次数
+
+        :param user: 用户
+        :return: (标签名称, 使用次数) 列表，按名称排序
+        :rtype: list[tuple[str, int]]
+        """
+        return list(
+            self.db.objects.filter(user=user, count__gt=0).order_by('tag').values_list('tag', 'count')
+        )
+
+    def apply(self, deltas: dict[tuple[int, str], int]) -> None:
+        """
+        按增量更新字典，计数归零的条目被删除
+
+        :param deltas: (用户ID, 标签名称) -> 计数增量
+        """
+        deltas = {key: n for key, n in deltas.items() if n and key[0] is not None}
+        if not deltas:
+            return
+        with transaction.atomic():
+            self.db.objects.bulk_create(
+                [self.db(user_id=user_id, tag=tag) for (user_id, tag), n in deltas.items() if n > 0],
+                ignore_conflicts=True,
+            )
+            for (user_id, tag), n in deltas.items():
+                self.db.objects.filter(user_id=user_id, tag=tag).update(count=F('count') + n)
+            self.db.objects.filter(user_id__in={user_id for user_id, _ in deltas}, count__lte=0).delete()
+
+    @staticmethod
+    def count_members(members) -> dict[tuple[int, str], int]:
+        """
+        统计成员关系查询集中各 (用户ID, 标签名称) 的数量（一次分组查询）
+
+        :param members: PeerTag 查询集
+        :rtype: dict[tuple[int, str], int]
+        """
+        rows = members.filter(user__isnull=False).values('user_id', 'tag__tag').annotate(n=Count('id')).order_by()
+        return {(row['user_id'], row['tag__tag']): row['n'] for row in rows}
+
+    def remove_members(self, members):
+        """
+        删除成员关系并从字典中扣减对应计数
+
+        :param members: 待删除的 PeerTag 查询集
+        :return: 查询集 delete() 的返回值
+        """
+        with transaction.atomic():
+            removed = self.count_members(members)
+            res = members.delete()
+            self.apply({key: -n for key, n in removed.items()})
+        return res
+
+    def rename_members(self, members, old_name, new_name) -> None:
+        """
+        标签改名时把成员关系的计数从旧名称移到新名称
+
+        :param members: 被改名标签的 PeerTag 查询集
+        :param old_name: 旧名称
+        :param new_name: 新名称
+        """
+        deltas: dict[tuple[int, str], int] = {}
+        for (user_id, _), n in self.count_members(members).items():
+            deltas[(user_id, old_name)] = deltas.get((user_id, old_name), 0) - n
+            deltas[(user_id, new_name)] = deltas.get((user_id, new_name), 0) + n
+        self.apply(deltas)
+
+
+class PersonalTransferService:
+    """
+    地址簿批量导入导出服务
+
+    记录格式为 ``{peer_id, alias, tags}``，支持 JSONL（每行一个 JSON 对象）与 CSV（首行为表头，
+    tags 单元格本身是一行逗号分隔的 CSV，名称含逗号或引号的标签按 CSV 规则加引号）。导入按批次解析设备、批量写入地址簿关联、别名与标签，每批的查询数固定；
+    导出按批次读取，逐行输出，可直接作为流式响应体。
+
+    :param guid: 地址簿 guid
+    :param user: 操作用户（导入的标签记为该用户设置）
+    """
+
+    FORMATS = ('jsonl', 'csv')
+    FIELDS = ('peer_id', 'alias', 'tags')
+    CHUNK_SIZE = 1000
+
+    def __init__(self, guid, user: User | None = None):
+        self.guid = guid
+        self.user = user
+
+    # -------- 解析与序列化 --------
+
+    @classmethod
+    def parse(cls, lines, fmt: str = 'jsonl'):
+        """
+        解析导入数据
+
+        :param lines: 文本行的可迭代对象（文件对象等）
+        :param fmt: 格式（jsonl/csv）
+        :return: 记录字典的生成器，无法解析的行产生 None
+        """
+        if fmt == 'csv':
+            for row in csv.DictReader(lines):
+                row = {key.strip(): value for key, value in row.items() if key and value is not None}
+                if 'tags' in row:
+                    row['tags'] = cls._split_tags_cell(row['tags'])
+                yield row
+            return
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+                continue
+            yield row if isinstance(row, dict) else None
+
+    @classmethod
+    def dump(cls, rows, fmt: str = 'jsonl'):
+        """
+        序列化导出记录
+
+        :param rows: 记录字典的可迭代对象
+        :param fmt: 格式（jsonl/csv）
+        :return: 文本片段的生成器（每条记录一行）
+        """
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(cls.FIELDS)
+            for row in rows:
+                writer.writerow([row['peer_id'], row['alias'], cls._join_tags_cell(row['tags'])])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+            return
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def _join_tags_cell(names: list[str]) -> str:
+        """
+        将标签名称列表编码为 CSV 单元格文本（名称含逗号、引号时加引号，导入时可原样还原）
+
+        :param names: 标签名称列表
+        :rtype: str
+        """
+        if not names:
+            return ''
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow(names)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _split_tags_cell(text: str) -> list[str]:
+        """
+        解析 CSV 单元格中的标签列表（``_join_tags_cell`` 的逆操作，兼容 ``a, b`` 形式的纯文本）
+
+        :param text: 单元格文本
+        :rtype: list[str]
+        """
+        if not text.strip():
+            return []
+        return next(csv.reader([text], skipinitialspace=True), [])
+
+    # -------- 导出 --------
+
+    def iter_export(self):
+        """
+        按批次导出地址簿设备（每批一次设备查询、一次别名查询、一次标签查询）
+
+        :return: ``{peer_id, alias, tags}`` 记录的生成器
+        """
+        peers = PeerPersonal.objects.filter(personal_id=self.guid).order_by('id').values_list('peer__peer_id', flat=True)
+        alias_service = AliasService()
+        tag_service = TagService(guid=self.guid, user=self.user)
+        for batch in batched(peers.iterator(chunk_size=self.CHUNK_SIZE), self.CHUNK_SIZE):
+            alias_map = alias_service.get_alias_map(guid=self.guid, peer_ids=batch)
+            tags_map = tag_service.get_tags_map(batch)
+            for peer_id in batch:
+                yield {
+                    'peer_id': peer_id,
+                    'alias': alias_map.get(peer_id, ''),
+                    'tags': tags_map.get(peer_id, []),
+                }
+
+    # -------- 导入 --------
+
+    def import_rows(self, rows) -> dict[str, int]:
+        """
+        批量导入设备到地址簿
+
+        - 设备已在地址簿中时不重复添加；设备不存在时跳过
+        - ``alias`` 非空时设置别名（覆盖已有别名）
+        - 提供 ``tags`` 字段时覆盖该设备在地址簿中的标签（空值表示清空），不存在的标签名称自动创建
+
+        :param rows: 记录字典的可迭代对象（parse 的返回值）
+        :return: 统计：added/existing/missing/invalid/aliases/tagged
+        :rtype: dict[str, int]
+        """
+        stats = dict.fromkeys(('added', 'existing', 'missing', 'invalid', 'aliases', 'tagged'), 0)
+        for batch in batched(rows, self.CHUNK_SIZE):
+            records: dict[str, dict] = {}
+            for row in batch:
+                peer_id = str((row or {}).get('peer_id') or '').strip()
+                if not peer_id:
+                    stats['invalid'] += 1
+                    continue
+                records[peer_id] = row
+            if records:
+                with transaction.atomic():
+                    self._import_chunk(records, stats)
+        if stats['added'] or stats['aliases'] or stats['tagged']:
+            ResourceVersionService().bump(ResourceVersionService.ab_key(self.guid))
+        logger.info(f'批量导入地址簿: guid={self.guid}, {stats}')
+        return stats
+
+    def _import_chunk(self, records: dict[str, dict], stats: dict[str, int]) -> None:
+        peers = dict(PeerInfo.objects.filter(peer_id__in=list(records)).values_list('peer_id', 'id'))
+        stats['missing'] += len(records) - len(peers)
+        if not peers:
+            return
+        records = {peer_id: row for peer_id, row in records.items() if peer_id in peers}
+
+        # 地址簿关联：表上没有唯一约束，先查出已在地址簿中的设备
+        existing = set(
+            PeerPersonal.objects.filter(personal_id=self.guid, peer_id__in=list(peers.values()))
+            .values_list('peer_id', flat=True)
+        )
+        PeerPersonal.objects.bulk_create(
+            [
+                PeerPersonal(peer_id=peers[peer_id], personal_id=self.guid)
+                for peer_id in records
+                if peers[peer_id] not in existing
+            ]
+        )
+        stats['added'] += len(peers) - len(existing)
+        stats['existing'] += len(existing)
+
+        # 别名：已有的批量更新，其余批量创建
+        max_length = Alias._meta.get_field('alias').max_length
+        aliases = {
+            peer_id: str(row['alias']).strip()[:max_length]
+            for peer_id, row in records.items()
+            if str(row.get('alias') or '').strip()
+        }
+        if aliases:
+            current = {obj.peer_id_id: obj for obj in Alias.objects.filter(guid_id=self.guid, peer_id__in=list(aliases))}
+            for peer_id, obj in current.items():
+                obj.alias = aliases[peer_id]
+            Alias.objects.bulk_update(list(current.values()), ['alias'])
+            Alias.objects.bulk_create(
+                [
+                    Alias(peer_id_id=peer_id, guid_id=self.guid, alias=alias)
+                    for peer_id, alias in aliases.items()
+                    if peer_id not in current
+                ],
+                ignore_conflicts=True,
+            )
+            stats['aliases'] += len(aliases)
+
+        # 标签：覆盖提供了 tags 字段的设备的成员关系
+        tags = {
+            peer_id: ClientTagsService.split_tags(row['tags'])
+            for peer_id, row in records.items()
+            if row.get('tags') is not None
+        }
+        if tags:
+            tag_ids = self._ensure_tags({name for names in tags.values() for name in names})
+            user_tag_service = UserTagService()
+            user_tag_service.remove_members(PeerTag.objects.filter(guid_id=self.guid, peer_id__in=list(tags)))
+            PeerTag.objects.bulk_create(
+                [
+                    PeerTag(guid_id=self.guid, tag_id=tag_ids[name], peer_id=peer_id, user=self.user)
+                    for peer_id, names in tags.items()
+                    for name in names
+                ],
+                ignore_conflicts=True,
+            )
+            if self.user is not None:
+                deltas: dict[tuple[int, str], int] = {}
+                for names in tags.values():
+                    for name in names:
+                        deltas[(self.user.id, name)] = deltas.get((self.user.id, name), 0) + 1
+                user_tag_service.apply(deltas)
+            stats['tagged'] += len(tags)
+
+    def _ensure_tags(self, names: set[str]) -> dict[str, int]:
+        if not names:
+            return {}
+        tags = Tag.objects.filter(guid_id=self.guid, tag__in=names)
+        tag_ids = dict(tags.values_list('tag', 'id'))
+        if missing := names - set(tag_ids):
+            Tag.objects.bulk_create(
+                [Tag(tag=name, color=TagService.DEFAULT_COLOR, guid_id=self.guid) for name in sorted(missing)],
+                ignore_conflicts=True,
+            )
+            tag_ids = dict(tags.values_list('tag', 'id'))
+        return tag_ids
 
 
 class SharePersonalService(BaseService):
@@ -1444,26 +2288,187 @@ class UserConfigService(BaseService):
             return qs.config_value
         return None
 
+    LEGACY_AB = 'legacy_ab'
+    LEGACY_AB_HASH = 'legacy_ab_hash'
+    # 压缩存储格式标记：marker + base64(zlib 压缩数据)；无标记的旧数据按原文读取
+    ZLIB_MARKER = 'zlib:'
+
+    @classmethod
+    def encode_blob(cls, data: str) -> str:
+        """
+        压缩编码大文本配置值
+
+        :param data: 原文
+        :return: 带格式标记的压缩文本
+        :rtype: str
+        """
+        return cls.ZLIB_MARKER + base64.b64encode(zlib.compress(data.encode('utf-8'))).decode('ascii')
+
+    @classmethod
+    def decode_blob(cls, value: str) -> str:
+        """
+        解码配置值，兼容未压缩的旧数据
+
+        :param value: 数据库中的配置值
+        :return: 原文
+        :rtype: str
+        """
+        if value.startswith(cls.ZLIB_MARKER):
+            return zlib.decompress(base64.b64decode(value[len(cls.ZLIB_MARKER):])).decode('utf-8')
+        return value
+
+    @staticmethod
+    def content_hash(data: str) -> str:
+        """
+        计算内容哈希（sha256 十六进制）
+
+        :param data: 原文
+        :rtype: str
+        """
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
     def get_legacy_ab(self) -> str | None:
         """
         获取 Legacy 地址簿数据
 
         :return: JSON 字符串或 None
         """
-        qs = UserConfig.objects.filter(user=self.user, config_name='legacy_ab').first()
-        return qs.config_value if qs else None
+        value = UserConfig.objects.filter(
+            user=self.user, config_name=self.LEGACY_AB
+        ).values_list('config_value', flat=True).first()
+        return self.decode_blob(value) if value is not None else None
 
-    def set_legacy_ab(self, data: str) -> None:
+    def get_legacy_ab_hash(self) -> str | None:
         """
-        存储 Legacy 地址簿数据
+        获取 Legacy 地址簿内容哈希（不读取地址簿数据本身）
+
+        :return: sha256 十六进制字符串，未存储时返回 None
+        :rtype: str | None
+        """
+        return UserConfig.objects.filter(
+            user=self.user, config_name=self.LEGACY_AB_HASH
+        ).values_list('config_value', flat=True).first()
+
+    def set_legacy_ab(self, data: str) -> bool:
+        """
+        压缩存储 Legacy 地址簿数据，内容与已存储的相同时不写入
 
         :param data: 地址簿 JSON 字符串
+        :return: 是否写入了数据库
+        :rtype: bool
         """
-        UserConfig.objects.update_or_create(
-            user=self.user,
-            config_name='legacy_ab',
-            defaults={"config_value": data}
-        )
+        data = data if isinstance(data, str) else str(data)
+        digest = self.content_hash(data)
+        if self.get_legacy_ab_hash() == digest:
+            return False
+        with transaction.atomic():
+            UserConfig.objects.update_or_create(
+                user=self.user,
+                config_name=self.LEGACY_AB,
+                defaults={"config_value": self.encode_blob(data)}
+            )
+            UserConfig.objects.update_or_create(
+                user=self.user,
+                config_name=self.LEGACY_AB_HASH,
+                defaults={"config_value": digest}
+            )
+        logger.info(f"更新Legacy地址簿: {self.user.username}, {len(data)} 字节")
+        return True
+
+
+class ResourceVersionService(BaseService):
+    """
+    资源版本号服务
+
+    写入设备、地址簿（设备/别名/标签）后递增对应资源的版本号，
+    客户端列表接口由版本号生成 ETag，未变化的轮询返回 304 而无需执行列表查询。
+    """
+    db = ResourceVersion
+
+    PEERS = 'peers'
+
+    # 资源名称 -> 提交后递增版本号的回调（固定对象，便于在同一事务内去重）
+    _commit_callbacks: dict = {}
+
+    @staticmethod
+    def ab_key(personal) -> str:
+        """
+        地址簿资源名称
+
+        :param personal: 地址簿对象或 guid
+        :rtype: str
+        """
+        guid = personal.guid if isinstance(personal, Personal) else personal
+        return f'ab:{guid}'
+
+    def bump(self, *names: str) -> None:
+        """
+        递增资源版本号
+
+        :param names: 资源名称
+        """
+        for name in set(names):
+            if self.db.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now()):
+                continue
+            _, created = self.db.objects.get_or_create(name=name, defaults={'version': 1})
+            if not created:
+                self.db.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+
+    @classmethod
+    def bump_on_commit(cls, *names: str) -> None:
+        """
+        事务提交后递增资源版本号；同一事务内多次调用（如级联删除逐行触发的信号）只递增一次
+
+        :param names: 资源名称
+        """
+        queued = {entry[1] for entry in transaction.get_connection().run_on_commit}
+        for name in set(names):
+            callback = cls._commit_callbacks.get(name)
+            if callback is None:
+                callback = cls._commit_callbacks.setdefault(name, lambda name=name: cls().bump(name))
+            if callback not in queued:
+                transaction.on_commit(callback)
+
+    def versions(self, *names: str) -> tuple:
+        """
+        读取资源版本号（单条查询）
+
+        需在查询列表数据之前调用：并发写入时至多返回新数据配旧版本号，下次轮询即可纠正。
+
+        :param names: 资源名称
+        :return: 与 names 一一对应的 (行ID, 版本号)，资源未写入过时为 (0, 0)
+        :rtype: tuple
+        """
+        rows = {
+            name: (pk, version)
+            for name, pk, version in self.db.objects.filter(name__in=names).values_list('name', 'id', 'version')
+        }
+        return tuple(rows.get(name, (0, 0)) for name in names)
+
+    @staticmethod
+    def make_etag(names: tuple, versions: tuple, scope: str = '') -> str:
+        """
+        由资源版本号生成 ETag
+
+        :param names: 资源名称
+        :param versions: versions() 的返回值
+        :param scope: 影响响应内容的其他因素（用户、查询参数等）
+        :return: 带引号的 ETag 字符串
+        :rtype: str
+        """
+        raw = '|'.join(f'{name}:{version}' for name, version in zip(names, versions)) + f'|{scope}'
+        return f'"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+
+    def etag(self, *names: str, scope: str = '') -> str:
+        """
+        读取资源版本号并生成 ETag
+
+        :param names: 响应所依赖的资源名称
+        :param scope: 影响响应内容的其他因素（用户、查询参数等）
+        :return: 带引号的 ETag 字符串
+        :rtype: str
+        """
+        return self.make_etag(names, self.versions(*names), scope)
 
 
 # ---------------------------------------------------------------------------
@@ -1737,11 +2742,26 @@ class PermissionService(BaseService):
 
     用户最终权限 = 直接角色权限并集 | 所属用户组角色权限并集。
     superuser 拥有所有权限。
+
+    有效权限按用户 ID 缓存在进程内，并记录缓存时的权限代数；角色、用户角色、用户组角色或用户所属组
+    变化时（见 ``apps.db.signals``）递增共享代数，各 worker 据此丢弃旧值，TTL 作为兜底。
     """
 
+    GENERATION_KEY = 'perm'
+
+    # user_id -> (权限代数, 有效权限值)
+    _cache = LRUCache(PublicConfig.PERM_CACHE_SIZE, ttl=PublicConfig.PERM_CACHE_TTL)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        使所有进程的权限缓存失效（在事务提交后生效）
+        """
+        transaction.on_commit(lambda: generations.bump(cls.GENERATION_KEY))
+
     def get_user_effective_perm(self, user: User) -> int:
         """
-        计算用户的全局有效权限值
+        获取用户的全局有效权限值（优先读取缓存）
 
         :param user: 用户对象
         :return: 权限位值
@@ -1749,6 +2769,16 @@ class PermissionService(BaseService):
         """
         if user.is_superuser:
             return DevicePermission.FULL
+        generation = generations.get(self.GENERATION_KEY)
+        cached = self._cache.get(user.id)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        perm = self._compute_effective_perm(user)
+        self._cache.set(user.id, (generation, perm))
+        return perm
+
+    @staticmethod
+    def _compute_effective_perm(user: User) -> int:
         perm = 0
         for role_perm in UserRole.objects.filter(user=user).values_list('role__permission', flat=True):
             perm |= role_perm
@@ -1771,3 +2801,92 @@ class PermissionService(BaseService):
         :rtype: bool
         """
         return (self.get_user_effective_perm(user) & perm_flag) == perm_flag
+
+
+class MaintenanceService:
+    """
+    数据清理服务：分批删除过期令牌、过期会话、失效的登录客户端记录与长期无心跳设备的心跳记录
+
+    :param batch_size: 每批删除的行数，批次之间单独提交，避免长时间锁表
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    def _delete_in_batches(self, qs) -> int:
+        model = qs.model
+        label = model._meta.label
+        total = 0
+        while pks := list(qs.values_list('pk', flat=True)[:self.batch_size]):
+            _, deleted = model.objects.filter(pk__in=pks).delete()
+            total += deleted.get(label, 0)
+        return total
+
+    def sweep_tokens(self) -> int:
+        """
+        删除已过期的令牌（额外保留一个活跃时间落库间隔，避免误删尚未落库的活跃令牌）
+
+        :return: 删除的行数
+        :rtype: int
+        """
+        expire = PublicConfig.TOKEN_TIMEOUT + PublicConfig.TOKEN_ACTIVITY_INTERVAL
+        return self._delete_in_batches(
+            Token.objects.filter(last_used_at__lt=get_local_time() - timedelta(seconds=expire))
+        )
+
+    def sweep_sessions(self) -> int:
+        """
+        删除已过期的 Web 会话
+
+        :return: 删除的行数
+        :rtype: int
+        """
+        return self._delete_in_batches(Session.objects.filter(expire_date__lt=timezone.now()))
+
+    def sweep_login_clients(self) -> int:
+        """
+        删除已没有对应令牌（已登出或令牌已过期）且超过 ``HEARTBEAT_RETENTION_DAYS`` 天未更新的登录客户端记录，
+        为 0 时不清理；刚登出的记录仍保留在客户端列表中
+
+        :return: 删除的行数
+        :rtype: int
+        """
+        days = PublicConfig.HEARTBEAT_RETENTION_DAYS
+        if days <= 0:
+            return 0
+        return self._delete_in_batches(
+            LoginClient.objects.filter(
+                ~Exists(Token.objects.filter(user_id=OuterRef('user_id'), uuid=OuterRef('uuid'))),
+                updated_at__lt=get_local_time() - timedelta(days=days),
+            )
+        )
+
+    def sweep_heartbeats(self) -> int:
+        """
+        删除超过 ``HEARTBEAT_RETENTION_DAYS`` 天无心跳的设备心跳记录，为 0 时不清理
+
+        :return: 删除的行数
+        :rtype: int
+        """
+        days = PublicConfig.HEARTBEAT_RETENTION_DAYS
+        if days <= 0:
+            return 0
+        return self._delete_in_batches(
+            HeartBeat.objects.filter(modified_at__lt=get_local_time() - timedelta(days=days))
+        )
+
+    def sweep(self) -> dict[str, int]:
+        """
+        执行全部清理（令牌先于登录客户端，使刚过期令牌对应的记录在同一轮被清理）
+
+        :return: 各表删除的行数
+        :rtype: dict[str, int]
+        """
+        result = {
+            'token': self.sweep_tokens(),
+            'session': self.sweep_sessions(),
+            'login_client': self.sweep_login_clients(),
+            'heartbeat': self.sweep_heartbeats(),
+        }
+        logger.info(f"数据清理完成: {result}")
+        return result
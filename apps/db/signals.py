@@ -0,0 +1,57 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.db.models import Role, UserRole, GroupRole, UserProfile, PeerInfo, DeviceGroup, DeviceGroupPeer
+from apps.db.service import PermissionService, ResourceVersionService
+
+
+def _touches(update_fields, field: str) -> bool:
+    return update_fields is None or field in update_fields
+
+
+@receiver(post_save, sender=UserRole, dispatch_uid='perm_cache_user_role_save')
+@receiver(post_delete, sender=UserRole, dispatch_uid='perm_cache_user_role_delete')
+@receiver(post_save, sender=GroupRole, dispatch_uid='perm_cache_group_role_save')
+@receiver(post_delete, sender=GroupRole, dispatch_uid='perm_cache_group_role_delete')
+@receiver(post_delete, sender=Role, dispatch_uid='perm_cache_role_delete')
+@receiver(post_delete, sender=UserProfile, dispatch_uid='perm_cache_profile_delete')
+def invalidate_perm_cache(sender, **kwargs):
+    """
+    角色分配关系变化时使权限缓存失效
+    """
+    PermissionService.invalidate()
+
+
+@receiver(post_save, sender=Role, dispatch_uid='perm_cache_role_save')
+def invalidate_perm_cache_on_role(sender, instance, update_fields=None, **kwargs):
+    """
+    角色权限值变化时使权限缓存失效
+    """
+    if _touches(update_fields, 'permission'):
+        PermissionService.invalidate()
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid='perm_cache_profile_save')
+def invalidate_perm_cache_on_profile(sender, instance, update_fields=None, **kwargs):
+    """
+    用户所属组变化时使权限缓存失效
+
+    ``QuerySet.update`` / ``bulk_update`` 不触发信号，相应的服务方法中显式调用 ``PermissionService.invalidate``。
+    """
+    if _touches(update_fields, 'group'):
+        PermissionService.invalidate()
+
+
+@receiver(post_save, sender=PeerInfo, dispatch_uid='peers_version_peer_save')
+@receiver(post_delete, sender=PeerInfo, dispatch_uid='peers_version_peer_delete')
+@receiver(post_save, sender=DeviceGroup, dispatch_uid='peers_version_group_save')
+@receiver(post_delete, sender=DeviceGroup, dispatch_uid='peers_version_group_delete')
+@receiver(post_save, sender=DeviceGroupPeer, dispatch_uid='peers_version_group_peer_save')
+@receiver(post_delete, sender=DeviceGroupPeer, dispatch_uid='peers_version_group_peer_delete')
+def bump_peers_version(sender, **kwargs):
+    """
+    设备、设备组或设备组成员变化时递增设备列表版本号（包括 Web 管理页与 shell 中的直接修改）
+
+    ``QuerySet.update`` 不触发信号，相应的服务方法中显式调用 ``ResourceVersionService.bump``。
+    """
+    ResourceVersionService.bump_on_commit(ResourceVersionService.PEERS)
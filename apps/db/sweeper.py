@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+from base import DATA_PATH
+from common.env import PublicConfig
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 等无 fcntl 的平台
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_started = False
+
+
+def _acquire_leader(lock_file) -> bool:
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _run(interval: float) -> None:
+    from apps.db.service import MaintenanceService
+
+    lock_file = open(DATA_PATH / 'sweep.lock', 'a')
+    leader = False
+    while True:
+        time.sleep(interval)
+        # 同一节点只有持有文件锁的 worker 执行清理；该 worker 退出后由其他 worker 接替
+        leader = leader or _acquire_leader(lock_file)
+        if not leader:
+            continue
+        try:
+            close_old_connections()
+            MaintenanceService(batch_size=PublicConfig.SWEEP_BATCH_SIZE).sweep()
+        except Exception as e:
+            logger.error(f"定时数据清理失败: {e}")
+        finally:
+            close_old_connections()
+
+
+def start_sweeper() -> None:
+    """
+    在当前 worker 中启动定时清理线程（``SWEEP_INTERVAL`` 为 0 时不启动），供 gunicorn ``post_fork`` 调用
+    """
+    global _started
+    interval = PublicConfig.SWEEP_INTERVAL
+    if _started or interval <= 0:
+        return
+    if fcntl is None:
+        logger.warning("当前平台不支持 fcntl，定时数据清理未启动，请使用 manage.py sweep")
+        return
+    DATA_PATH.mkdir(parents=True, exist_ok=True)
+    _started = True
+    threading.Thread(target=_run, args=(interval,), name="sweeper", daemon=True).start()
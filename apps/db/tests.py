@@ -0,0 +1,108 @@
+import io
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.db.models import Personal, Tag, PeerTag, PeerInfo, PeerPersonal
+from apps.db.service import TagService, PersonalTransferService
+
+
+class TagServiceTagsMapTest(TestCase):
+    """
+    TagService.get_tags_map 的查询次数不随地址簿规模增长
+    """
+
+    TAGS = ['办公', '家庭', '服务器']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tag_owner', password='password')
+        cls.personal = Personal.objects.create(personal_name='tags', creator=cls.user, personal_type='private')
+        cls.tags = [
+            Tag.objects.create(tag=name, color=TagService.DEFAULT_COLOR, guid=cls.personal) for name in cls.TAGS
+        ]
+
+    def build_book(self, size: int) -> list[str]:
+        """
+        构造包含 size 台设备的地址簿，第 i 台设备带有前 (i + 1) % 4 个标签
+
+        :param size: 设备数量
+        :return: 设备ID列表
+        :rtype: list[str]
+        """
+        peer_ids = [f'peer-{i}' for i in range(size)]
+        PeerTag.objects.bulk_create(
+            [
+                PeerTag(guid=self.personal, tag=tag, peer_id=peer_id, user=self.user)
+                for i, peer_id in enumerate(peer_ids)
+                for tag in self.tags[:(i + 1) % 4]
+            ],
+            batch_size=1000,
+        )
+        return peer_ids
+
+    def assert_tags_map(self, size: int):
+        peer_ids = self.build_book(size)
+        service = TagService(self.personal.guid, self.user)
+        with self.assertNumQueries(1):
+            tags_map = service.get_tags_map(peer_ids)
+        self.assertEqual(len(tags_map), sum(1 for i in range(size) if (i + 1) % 4))
+        for i, peer_id in enumerate(peer_ids):
+            self.assertEqual(tags_map.get(peer_id, []), self.TAGS[:(i + 1) % 4])
+
+    def test_single_peer(self):
+        self.assert_tags_map(1)
+
+    def test_hundred_peers(self):
+        self.assert_tags_map(100)
+
+    def test_ten_thousand_peers(self):
+        self.assert_tags_map(10_000)
+
+    def test_empty_peer_list(self):
+        service = TagService(self.personal.guid, self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(service.get_tags_map([]), {})
+
+
+class PersonalTransferCsvTest(TestCase):
+    """
+    地址簿 CSV 导出后再导入，标签（包括名称含逗号、引号的标签）保持不变
+    """
+
+    TAGS = [['机房,北京', 'plain', 'say "hi"'], [], ['单个']]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('transfer_owner', password='password')
+        cls.source = Personal.objects.create(personal_name='source', creator=cls.user, personal_type='private')
+        cls.target = Personal.objects.create(personal_name='target', creator=cls.user, personal_type='private')
+        for i, names in enumerate(cls.TAGS):
+            peer = PeerInfo.objects.create(
+                peer_id=f'transfer-{i}', uuid=f'transfer-uuid-{i}', cpu='cpu', device_name=f'device-{i}',
+                memory='8G', os='linux', version='1.4.0',
+            )
+            PeerPersonal.objects.create(peer=peer, personal=cls.source)
+            for name in names:
+                tag, _ = Tag.objects.get_or_create(
+                    tag=name, guid=cls.source, defaults={'color': TagService.DEFAULT_COLOR}
+                )
+                PeerTag.objects.create(guid=cls.source, tag=tag, peer_id=peer.peer_id, user=cls.user)
+
+    def test_csv_round_trip(self):
+        exported = list(PersonalTransferService(self.source.guid, self.user).iter_export())
+        text = ''.join(PersonalTransferService.dump(exported, 'csv'))
+
+        rows = list(PersonalTransferService.parse(io.StringIO(text), 'csv'))
+        self.assertEqual([row['tags'] for row in rows], [row['tags'] for row in exported])
+
+        PersonalTransferService(self.target.guid, self.user).import_rows(rows)
+        imported = list(PersonalTransferService(self.target.guid, self.user).iter_export())
+        self.assertEqual(
+            {row['peer_id']: sorted(row['tags']) for row in imported},
+            {f'transfer-{i}': sorted(names) for i, names in enumerate(self.TAGS)},
+        )
+
+    def test_plain_comma_separated_tags(self):
+        rows = list(PersonalTransferService.parse(io.StringIO('peer_id,alias,tags\np1,,"red, blue"\n'), 'csv'))
+        self.assertEqual(rows[0]['tags'], ['red', 'blue'])
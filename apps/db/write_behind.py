@@ -0,0 +1,278 @@
+import logging
+import os
+import threading
+import time
+
+from django.db import transaction, OperationalError, IntegrityError, close_old_connections
+from django.db.models import Q
+
+from apps.db.models import HeartBeat, Token
+from common.env import PublicConfig
+from common.log_summary import get_summary
+
+logger = logging.getLogger(__name__)
+
+_buffers: list['WriteBehindBuffer'] = []
+_summary = get_summary('写后缓冲', {'dropped': '写入失败丢弃'})
+
+
+class WriteBehindBuffer:
+    """
+    进程内写后缓冲基类
+
+    以 key 聚合待写入的数据（同 key 后写覆盖先写），由后台线程按时间间隔或条目数批量落库。
+    后台线程在首次写入时按进程惰性启动，兼容 gunicorn ``preload_app`` 的 fork 模型。
+
+    :param flush_interval: 刷新间隔（秒）
+    :param flush_size: 缓冲条目达到该数量时立即刷新
+    """
+
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.15
+
+    def __init__(self, flush_interval: float, flush_size: int):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._thread = None
+        _buffers.append(self)
+
+    def put(self, key, value) -> None:
+        """
+        写入缓冲（后写覆盖先写）
+
+        :param key: 聚合键
+        :param value: 待写入的数据
+        """
+        self._ensure_thread()
+        with self._lock:
+            self._pending[key] = value
+            size = len(self._pending)
+        if size >= self.flush_size:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        将缓冲中的数据批量写入数据库，失败时将未写入的数据放回缓冲
+
+        :return: 本次写入的条目数
+        :rtype: int
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            last_exc = None
+            for attempt in range(1, self.MAX_RETRIES + 1):
+                try:
+                    with transaction.atomic():
+                        self.write(batch)
+                    return len(batch)
+                except OperationalError as e:
+                    last_exc = e
+                    if "locked" not in str(e).lower():
+                        break
+                    wait = self.RETRY_BACKOFF * (2 ** (attempt - 1))
+                    logger.warning(f"{self.__class__.__name__} 批量写入被锁，第{attempt}次重试 (等待{wait:.2f}s)")
+                    time.sleep(wait)
+                except Exception as e:
+                    # 非数据库繁忙的错误重试也无法恢复：丢弃本批，记录堆栈并计入汇总
+                    logger.exception(f"{self.__class__.__name__} 批量写入失败，丢弃 {len(batch)} 条: {e}")
+                    _summary.incr('dropped', len(batch))
+                    return 0
+
+            # 数据库繁忙：放回缓冲等待下次刷新，已有的新数据优先
+            with self._lock:
+                for key, value in batch.items():
+                    self._pending.setdefault(key, value)
+            logger.error(f"{self.__class__.__name__} 批量写入失败，{len(batch)} 条放回缓冲: {last_exc}")
+            return 0
+
+    def write(self, batch: dict) -> None:
+        """
+        子类实现：在事务内将一批数据写入数据库
+
+        :param batch: key -> value 映射
+        """
+        raise NotImplementedError
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            self._pid = pid
+            self._wakeup = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.__class__.__name__}-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.__class__.__name__} 刷新线程异常: {e}")
+
+
+class HeartBeatBuffer(WriteBehindBuffer):
+    """
+    心跳写后缓冲
+
+    以 uuid 为键记录最新一次心跳，批量刷新时一次查询已有记录，分别 ``bulk_update`` 与 ``bulk_create``；
+    与已有记录存在唯一键冲突的心跳逐条写入（合并冲突记录），不影响同批的其他心跳。
+    """
+
+    def record(self, uuid, peer_id, modified_at, ver=None) -> None:
+        self.put(uuid, {
+            "uuid": uuid,
+            "peer_id": peer_id,
+            "modified_at": modified_at,
+            "ver": ver,
+        })
+
+    def write(self, batch: dict) -> None:
+        # 同一 peer_id 仅保留最新一条，避免批内唯一键冲突
+        by_peer = {}
+        for item in batch.values():
+            prev = by_peer.get(item["peer_id"])
+            if prev is None or item["modified_at"] >= prev["modified_at"]:
+                by_peer[item["peer_id"]] = item
+        items = list(by_peer.values())
+
+        try:
+            with transaction.atomic():
+                deferred = self._write_bulk(items)
+        except IntegrityError as e:
+            # 批量写入的唯一键冲突只回滚批量部分，逐条写入，不丢弃其他设备的心跳
+            logger.warning(f"心跳批量写入唯一键冲突，改为逐条写入 {len(items)} 条: {e}")
+            deferred = items
+        for item in deferred:
+            self._write_one(item)
+
+    def _write_bulk(self, items: list[dict]) -> list[dict]:
+        """
+        批量写入无冲突的心跳
+
+        :return: 需要逐条写入的心跳（uuid 与 peer_id 分属不同的已有记录，或与批内其他心跳对应同一记录）
+        """
+        uuids = [item["uuid"] for item in items]
+        peer_ids = [item["peer_id"] for item in items]
+        existing = list(HeartBeat.objects.filter(Q(uuid__in=uuids) | Q(peer_id__in=peer_ids)))
+        by_uuid = {hb.uuid: hb for hb in existing}
+        by_peer_id = {hb.peer_id: hb for hb in existing}
+
+        to_update: dict[int, HeartBeat] = {}
+        to_create: list[HeartBeat] = []
+        deferred: list[dict] = []
+        for item in items:
+            hb_uuid = by_uuid.get(item["uuid"])
+            hb_peer = by_peer_id.get(item["peer_id"])
+            if hb_uuid is not None and hb_peer is not None and hb_uuid.pk != hb_peer.pk:
+                deferred.append(item)
+                continue
+            hb = hb_uuid or hb_peer
+            if hb is None:
+                to_create.append(HeartBeat(**item))
+                continue
+            if hb.pk in to_update:
+                deferred.append(item)
+                continue
+            for field, value in item.items():
+                setattr(hb, field, value)
+            to_update[hb.pk] = hb
+
+        if to_update:
+            HeartBeat.objects.bulk_update(list(to_update.values()), ["uuid", "peer_id", "modified_at", "ver"])
+        if to_create:
+            HeartBeat.objects.bulk_create(to_create)
+            get_summary('心跳').incr('created', len(to_create))
+        return deferred
+
+    @staticmethod
+    def _write_one(item: dict) -> None:
+        """
+        单条写入心跳：uuid 对应的记录保留并更新，占用该 peer_id 的其他记录（设备ID已迁移到新安装）删除
+        """
+        try:
+            with transaction.atomic():
+                rows = list(HeartBeat.objects.filter(Q(uuid=item["uuid"]) | Q(peer_id=item["peer_id"])))
+                keep = next((hb for hb in rows if hb.uuid == item["uuid"]), rows[0] if rows else None)
+                stale = [hb.pk for hb in rows if hb is not keep]
+                if stale:
+                    HeartBeat.objects.filter(pk__in=stale).delete()
+                if keep is None:
+                    HeartBeat.objects.create(**item)
+                    get_summary('心跳').incr('created')
+                    return
+                for field, value in item.items():
+                    setattr(keep, field, value)
+                keep.save(update_fields=["uuid", "peer_id", "modified_at", "ver"])
+        except IntegrityError as e:
+            logger.error(f"心跳写入失败，丢弃: uuid={item['uuid']}, peer_id={item['peer_id']}: {e}")
+
+
+class TokenActivityBuffer(WriteBehindBuffer):
+    """
+    令牌活跃时间写后缓冲
+
+    以令牌为键记录最新一次使用时间，按刷新间隔一次查询主键后 ``bulk_update(fields=['last_used_at'])``，
+    同一令牌在一个刷新周期内至多写入一次。
+    """
+
+    def record(self, token, last_used_at) -> None:
+        self.put(token, last_used_at)
+
+    def write(self, batch: dict) -> None:
+        # 令牌已被删除时不会匹配到任何行
+        tokens = list(Token.objects.filter(token__in=list(batch)).only("pk", "token"))
+        for token in tokens:
+            token.last_used_at = batch[token.token]
+        if tokens:
+            Token.objects.bulk_update(tokens, ["last_used_at"])
+
+
+heartbeat_buffer = HeartBeatBuffer(
+    flush_interval=PublicConfig.HEARTBEAT_FLUSH_INTERVAL,
+    flush_size=PublicConfig.HEARTBEAT_FLUSH_SIZE,
+)
+
+token_activity_buffer = TokenActivityBuffer(
+    flush_interval=PublicConfig.TOKEN_ACTIVITY_INTERVAL,
+    flush_size=PublicConfig.TOKEN_ACTIVITY_FLUSH_SIZE,
+)
+
+
+def drain_all() -> None:
+    """
+    刷新本进程写入过的写后缓冲，供 gunicorn ``worker_exit`` 回调调用，避免平滑重启时丢失数据
+
+    不注册 atexit：测试或管理命令退出时测试数据库可能已销毁，此时刷新会写入正式数据库
+    """
+    pid = os.getpid()
+    for buffer in _buffers:
+        if buffer._pid != pid:
+            # 本进程未写入过（或继承自 fork 前父进程）的缓冲不刷新
+            continue
+        try:
+            count = buffer.flush()
+            if count:
+                logger.info(f"{buffer.__class__.__name__} 退出前刷新: {count} 条")
+        except Exception as e:
+            logger.error(f"{buffer.__class__.__name__} 退出前刷新失败: {e}")
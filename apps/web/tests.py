@@ -0,0 +1,122 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.common.response import ITERATOR_CHUNK_SIZE
+from apps.db.models import Personal, PeerInfo, PeerPersonal, Alias, Tag, PeerTag, HeartBeat
+from apps.db.service import HeartBeatService, TagService
+
+
+class PersonalDetailTest(TestCase):
+    """
+    地址簿详情的查询次数与地址簿大小无关，在线状态、别名与标签与逐设备查询一致
+    """
+
+    TAGS = ('办公', '服务器')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('book_owner', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def build_book(self, name: str, size: int) -> Personal:
+        """
+        构造包含 size 台设备的地址簿：部分设备有别名、标签，部分在线（按设备ID或UUID匹配心跳）
+
+        :param name: 地址簿名称
+        :param size: 设备数量
+        :rtype: Personal
+        """
+        personal = Personal.objects.create(personal_name=name, creator=self.user, personal_type='private')
+        tags = Tag.objects.bulk_create(
+            [Tag(tag=tag, color=TagService.DEFAULT_COLOR, guid=personal) for tag in self.TAGS]
+        )
+        peers = PeerInfo.objects.bulk_create([
+            PeerInfo(
+                peer_id=f'{name}-{i}', uuid=f'{name}-uuid-{i}', cpu='cpu', device_name=f'device-{i}',
+                memory='8G', os='windows', version='1.4.0',
+            )
+            for i in range(size)
+        ], batch_size=1000)
+        PeerPersonal.objects.bulk_create(
+            [PeerPersonal(peer=peer, personal=personal) for peer in peers], batch_size=1000
+        )
+        Alias.objects.bulk_create(
+            [Alias(alias=f'alias-{i}', peer_id=peer, guid=personal) for i, peer in enumerate(peers) if i % 3 == 0],
+            batch_size=1000,
+        )
+        PeerTag.objects.bulk_create(
+            [
+                PeerTag(guid=personal, tag=tag, peer_id=peer.peer_id, user=self.user)
+                for i, peer in enumerate(peers)
+                for tag in tags[:i % 3]
+            ],
+            batch_size=1000,
+        )
+        now = timezone.now()
+        HeartBeat.objects.bulk_create([
+            HeartBeat(
+                # 每 4 台设备中：1 台按设备ID在线，1 台仅按 UUID 在线，1 台心跳已过期，1 台没有心跳
+                peer_id=peer.peer_id if i % 4 != 1 else f'{peer.peer_id}-renamed',
+                uuid=peer.uuid,
+                modified_at=now if i % 4 in (0, 1) else now - timedelta(days=1),
+            )
+            for i, peer in enumerate(peers) if i % 4 != 3
+        ], batch_size=1000)
+        return personal
+
+    def expected_devices(self, personal: Personal) -> list[dict]:
+        """
+        逐台设备查询在线状态、别名与标签得到的结果
+
+        :param personal: 地址簿
+        :rtype: list[dict]
+        """
+        heartbeat_service = HeartBeatService()
+        tag_service = TagService(personal.guid, self.user)
+        aliases = dict(Alias.objects.filter(guid=personal).values_list('peer_id', 'alias'))
+        devices = []
+        for relation in personal.personal_peer.select_related('peer'):
+            peer = relation.peer
+            devices.append({
+                'peer_id': peer.peer_id,
+                'alias': aliases.get(peer.peer_id, ''),
+                'tags': ', '.join(tag_service.get_tags_map([peer.peer_id]).get(peer.peer_id, [])),
+                'is_online': heartbeat_service.is_online(peer.peer_id, peer.uuid),
+            })
+        return devices
+
+    def fetch_detail(self, personal: Personal) -> tuple[dict, int]:
+        """
+        请求地址簿详情
+
+        :return: (响应数据, 查询次数)
+        :rtype: tuple[dict, int]
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/personal/detail', {'guid': personal.guid})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(content)['data'], len(queries)
+
+    def assert_detail(self, personal: Personal, size: int) -> int:
+        data, queries = self.fetch_detail(personal)
+        self.assertEqual(data['device_count'], size)
+        self.assertEqual(
+            [{key: device[key] for key in ('peer_id', 'alias', 'tags', 'is_online')} for device in data['devices']],
+            self.expected_devices(personal),
+        )
+        return queries
+
+    def test_query_count_independent_of_book_size(self):
+        small_size, large_size = 10, ITERATOR_CHUNK_SIZE + 10
+        small_queries = self.assert_detail(self.build_book('small', small_size), small_size)
+        large_queries = self.assert_detail(self.build_book('large', large_size), large_size)
+        self.assertEqual(large_queries, small_queries)
@@ -30,6 +30,8 @@ urlpatterns = [
     path('personal/remove-device', view_personal.remove_device_from_personal, name='web_personal_remove_device'),
     path('personal/update-alias', view_personal.update_device_alias_in_personal, name='web_personal_update_alias'),
     path('personal/update-tags', view_personal.update_device_tags_in_personal, name='web_personal_update_tags'),
+    path('personal/import', view_personal.import_personal_devices, name='web_personal_import'),
+    path('personal/export', view_personal.export_personal_devices, name='web_personal_export'),
     # 角色管理
     path('role/list', view_permission.role_list, name='web_role_list'),
     path('role/create', view_permission.role_create, name='web_role_create'),
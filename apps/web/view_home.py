@@ -13,7 +13,7 @@ from apps.db.models import DevicePermission, UserRole, GroupRole
 from apps.db.service import (
     UserService, PeerInfoService, PersonalService,
     AliasService, HeartBeatService, ClientTagsService,
-    PermissionService, GroupService,
+    PermissionService, GroupService, UserTagService,
 )
 from apps.web.view_personal import is_default_personal
 
@@ -331,7 +331,7 @@ def update_device(request: HttpRequest) -> JsonResponse:
     :rtype: JsonResponse
     :notes:
     - 别名写入当前用户的"默认地址簿"（不存在则创建）
-    - 标签写入 ClientTags（当前用户 + 默认地址簿 guid 作用域）
+    - 标签写入默认地址簿的标签成员关系（不存在的标签名称自动创建）
     """
     peer_id = (request.POST.get('peer_id') or '').strip()
     if not peer_id:
@@ -362,18 +362,10 @@ def update_device(request: HttpRequest) -> JsonResponse:
     # 更新标签（当 tags 参数存在时）
     if tags_str is not None:
         # 归一化标签：逗号分隔，去空白、去重，保持顺序
-        parts = [p.strip() for p in tags_str.split(',')] if tags_str is not None else []
-        parts = [p for p in parts if p]
-        seen = set()
-        uniq = []
-        for p in parts:
-            if p not in seen:
-                seen.add(p)
-                uniq.append(p)
-        joined = ', '.join(uniq)
-        if joined:
+        tag_names = client_tags_service.split_tags(tags_str)
+        if tag_names:
             client_tags_service.update_or_create_client_tag(
-                request.user, peer_id, personal, joined
+                request.user, peer_id, personal, tag_names
             )
         else:
             client_tags_service.delete_client_tag(request.user, peer_id, personal)
@@ -409,7 +401,7 @@ def device_statuses(request: HttpRequest) -> JsonResponse:
         return JsonResponse({'ok': True, 'data': {}})
     peer_ids = peer_ids[:500]
 
-    online_set = HeartBeatService().get_online_peer_ids(peer_ids, timeout_seconds=60)
+    online_set = HeartBeatService().get_online_peer_ids(peer_ids)
     data = {pid: {'is_online': (pid in online_set)} for pid in peer_ids}
     return JsonResponse({'ok': True, 'data': data})
 
@@ -515,8 +507,12 @@ def device_tags(request: HttpRequest) -> JsonResponse:
 
     :param request: Http 请求对象
     :type request: HttpRequest
-    :return: JSON 响应，形如 {"ok": true, "data": ["tag1", "tag2"]}
+    :return: JSON 响应，形如 {"ok": true, "data": ["tag1", "tag2"], "counts": {"tag1": 3, "tag2": 1}}
     :rtype: JsonResponse
     """
-    tags = PeerInfoService().get_all_tags_for_user(request.user)
-    return JsonResponse({'ok': True, 'data': tags})
+    tag_counts = UserTagService().get_tag_counts(request.user)
+    return JsonResponse({
+        'ok': True,
+        'data': [tag for tag, _ in tag_counts],
+        'counts': dict(tag_counts),
+    })
@@ -1,13 +1,22 @@
+import io
+import os
+
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 
 from apps.client_apis.common import request_debug_log
+from apps.common.response import StreamingJsonResponse, JsonStream, ITERATOR_CHUNK_SIZE
 from apps.db.service import (
     PersonalService, AliasService, PeerInfoService,
-    HeartBeatService, ClientTagsService,
+    HeartBeatService, ClientTagsService, PersonalTransferService, TagService,
 )
 
+_TRANSFER_CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
 
 def is_default_personal(personal, user):
     """
@@ -143,34 +152,30 @@ def personal_detail(request: HttpRequest) -> JsonResponse:
 
     peers = personal_service.get_peers_by_personal(guid=guid)
 
-    # 获取所有peer的ID列表
-    peer_ids = [peer_info.peer.peer_id for peer_info in peers]
-
-    # 使用AliasService批量获取别名映射
-    alias_map = AliasService().get_alias_map(guid=guid, peer_ids=peer_ids)
-
     heartbeat_service = HeartBeatService()
-    client_tags_service = ClientTagsService()
-
-    devices = []
-    for peer_info in peers:
-        peer = peer_info.peer
-        # 检查在线状态
-        is_online = heartbeat_service.is_online(peer.peer_id, uuid=peer.uuid)
-
-        # 获取该设备在该地址簿中的标签
-        tags = client_tags_service.get_tags_text_by_peer_in_personal(peer.peer_id, guid)
-
-        devices.append({
-            'peer_id': peer.peer_id,
-            'alias': alias_map.get(peer.peer_id, ''),
-            'tags': tags,
-            'device_name': peer.device_name,
-            'os': peer.os,
-            'version': peer.version,
-            'is_online': is_online,
-            'created_at': peer.created_at.strftime('%Y-%m-%d %H:%M:%S') if peer.created_at else '',
-        })
+    tag_service = TagService(guid=guid, user=request.user)
+    alias_service = AliasService()
+
+    def iter_devices():
+        # 一次查询流式读取设备（联表取回 peer，在线状态与别名以子查询标注），标签一次查询整个地址簿，
+        # 查询数与地址簿大小无关；设备行逐块读取，常驻内存的只有标签映射
+        tags_map = tag_service.get_tags_map()
+        rows = peers.select_related('peer').annotate(
+            is_online=heartbeat_service.online_expression(prefix='peer__'),
+            alias=alias_service.alias_expression(guid, peer_id_ref='peer__peer_id'),
+        )
+        for peer_info in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            peer = peer_info.peer
+            yield {
+                'peer_id': peer.peer_id,
+                'alias': peer_info.alias,
+                'tags': ', '.join(tags_map.get(peer.peer_id, [])),
+                'device_name': peer.device_name,
+                'os': peer.os,
+                'version': peer.version,
+                'is_online': peer_info.is_online,
+                'created_at': peer.created_at.strftime('%Y-%m-%d %H:%M:%S') if peer.created_at else '',
+            }
 
     data = {
         'guid': personal.guid,
@@ -178,11 +183,11 @@ def personal_detail(request: HttpRequest) -> JsonResponse:
         'display_name': '默认地址簿' if personal.personal_name == f'{request.user.username}_personal' else personal.personal_name,
         'personal_type': personal.personal_type,
         'created_at': personal.created_at.strftime('%Y-%m-%d %H:%M:%S') if personal.created_at else '',
-        'device_count': len(devices),
-        'devices': devices,
+        'device_count': peers.count(),
+        'devices': JsonStream(iter_devices()),
     }
 
-    return JsonResponse({'ok': True, 'data': data})
+    return StreamingJsonResponse({'ok': True, 'data': data})
 
 
 @request_debug_log
@@ -362,3 +367,75 @@ def update_device_tags_in_personal(request: HttpRequest) -> JsonResponse:
     )
 
     return JsonResponse({'ok': True})
+
+
+def _transfer_format(fmt: str, filename: str = '') -> str | None:
+    fmt = (fmt or '').strip().lower() or os.path.splitext(filename or '')[1].lstrip('.').lower() or 'jsonl'
+    if fmt in ('ndjson', 'json'):
+        fmt = 'jsonl'
+    return fmt if fmt in PersonalTransferService.FORMATS else None
+
+
+@request_debug_log
+@require_http_methods(['POST'])
+@login_required(login_url='web_login')
+def import_personal_devices(request: HttpRequest) -> JsonResponse:
+    """
+    批量导入设备到地址簿
+
+    :param request: POST，包含 guid、format（jsonl/csv，可选，默认按文件扩展名判断，否则为 jsonl）；
+        数据为上传的文件 file，未使用表单上传时读取请求体（guid、format 放在查询参数中）
+    :return: {"ok": true, "data": {"added": N, "existing": N, "missing": N, "invalid": N, "aliases": N, "tagged": N}}
+    """
+    is_form = request.content_type in ('multipart/form-data', 'application/x-www-form-urlencoded')
+    params = request.POST if is_form else request.GET
+    guid = (params.get('guid') or '').strip()
+    upload = request.FILES.get('file') if is_form else None
+    if not guid or (is_form and upload is None):
+        return JsonResponse({'ok': False, 'err_msg': '参数错误'}, status=400)
+
+    fmt = _transfer_format(params.get('format'), upload.name if upload else '')
+    if fmt is None:
+        return JsonResponse({'ok': False, 'err_msg': '不支持的格式'}, status=400)
+
+    personal = PersonalService().get_personal_by_user(guid, request.user)
+    if not personal:
+        return JsonResponse({'ok': False, 'err_msg': '地址簿不存在或无权限操作'}, status=404)
+
+    # 逐行读取上传内容，不整体载入内存
+    stream = io.TextIOWrapper(upload or io.BytesIO(request.body), encoding='utf-8-sig', newline='')
+    try:
+        result = PersonalTransferService(guid, request.user).import_rows(PersonalTransferService.parse(stream, fmt))
+    except (UnicodeDecodeError, ValueError):
+        return JsonResponse({'ok': False, 'err_msg': '数据解析失败'}, status=400)
+    return JsonResponse({'ok': True, 'data': result})
+
+
+@request_debug_log
+@require_http_methods(['GET'])
+@login_required(login_url='web_login')
+def export_personal_devices(request: HttpRequest):
+    """
+    导出地址簿设备（流式响应，格式与导入相同）
+
+    :param request: GET，包含 guid、format（jsonl/csv，默认 jsonl）
+    :return: 附件形式的 JSONL/CSV 流
+    """
+    guid = (request.GET.get('guid') or '').strip()
+    if not guid:
+        return JsonResponse({'ok': False, 'err_msg': '参数错误'}, status=400)
+    fmt = _transfer_format(request.GET.get('format'))
+    if fmt is None:
+        return JsonResponse({'ok': False, 'err_msg': '不支持的格式'}, status=400)
+
+    personal = PersonalService().get_personal_by_user(guid, request.user)
+    if not personal:
+        return JsonResponse({'ok': False, 'err_msg': '地址簿不存在或无权限查看'}, status=404)
+
+    service = PersonalTransferService(guid, request.user)
+    response = StreamingHttpResponse(
+        (part.encode('utf-8') for part in service.dump(service.iter_export(), fmt)),
+        content_type=_TRANSFER_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{guid}.{fmt}"'
+    return response
@@ -20,6 +20,55 @@ class PublicConfig:
     APP_VERSION = get_env('APP_VERSION', '')
     SESSION_TIMEOUT = int(get_env('SESSION_TIMEOUT', 3600))
     TOKEN_TIMEOUT = int(get_env('TOKEN_TIMEOUT', 3600))  # Token 超时时间（秒）
+    # 令牌解析缓存：token -> (用户, uuid, 最后使用时间, 设备)，鉴权路径无需访问数据库
+    TOKEN_CACHE_SIZE = int(get_env('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_TTL = int(get_env('TOKEN_CACHE_TTL', 60))  # 缓存有效期（秒），决定多 worker 间变更的最长生效延迟
+    # /api/ab/peers 序列化结果缓存：缓存的地址簿数量，设备数超过上限的地址簿不缓存（流式输出）
+    AB_SNAPSHOT_CACHE_SIZE = int(get_env('AB_SNAPSHOT_CACHE_SIZE', 256))
+    AB_SNAPSHOT_MAX_PEERS = int(get_env('AB_SNAPSHOT_MAX_PEERS', 5000))
+    # 有效权限缓存：按用户 ID 缓存，角色与用户组变更时跨 worker 失效，TTL 为兜底有效期（秒）
+    PERM_CACHE_SIZE = int(get_env('PERM_CACHE_SIZE', 10000))
+    PERM_CACHE_TTL = int(get_env('PERM_CACHE_TTL', 300))
+    # 令牌模式：db（随机令牌，查表校验）/ signed（HMAC 签名令牌，签发后 TOKEN_TIMEOUT 内纯计算校验）
+    TOKEN_MODE = get_env('TOKEN_MODE', 'db')
+    TOKEN_SIGNING_KEY = get_env('TOKEN_SIGNING_KEY', '')  # 签名密钥，默认在数据目录生成 token_signing.key
+    # 令牌最后使用时间先记在内存，按间隔批量落库（同一令牌每个间隔至多写一次）
+    TOKEN_ACTIVITY_INTERVAL = float(get_env('TOKEN_ACTIVITY_INTERVAL', 60))
+    TOKEN_ACTIVITY_FLUSH_SIZE = int(get_env('TOKEN_ACTIVITY_FLUSH_SIZE', 5000))  # 缓冲条目达到该数量时提前刷新
+    # 心跳写后缓冲：开启后心跳先写入进程内缓冲，按间隔/条数批量落库
+    HEARTBEAT_WRITE_BEHIND = str2bool(get_env('HEARTBEAT_WRITE_BEHIND', False))
+    HEARTBEAT_FLUSH_INTERVAL = float(get_env('HEARTBEAT_FLUSH_INTERVAL', 1))  # 刷新间隔（秒）
+    HEARTBEAT_FLUSH_SIZE = int(get_env('HEARTBEAT_FLUSH_SIZE', 500))  # 缓冲达到该条数立即刷新
+    # 心跳写入粒度（秒）：距本进程上次落库不足该时间且版本号未变的心跳不再写库，0 表示每次都写；
+    # 实际生效值不超过 ONLINE_TIMEOUT 的 1/3，避免基于数据库的在线判定把在线设备误判为离线
+    HEARTBEAT_WRITE_GRANULARITY = int(get_env('HEARTBEAT_WRITE_GRANULARITY', 0))
+    HEARTBEAT_LAST_WRITE_CACHE_SIZE = int(get_env('HEARTBEAT_LAST_WRITE_CACHE_SIZE', 50000))
+    # 系统信息指纹缓存：相同内容的重复上报直接返回，不访问数据库
+    SYSINFO_CACHE_SIZE = int(get_env('SYSINFO_CACHE_SIZE', 50000))
+    SYSINFO_CACHE_TTL = int(get_env('SYSINFO_CACHE_TTL', 3600))  # 缓存有效期（秒）
+    # 系统信息有效期（秒）：超过后由心跳响应要求客户端重新上报，0 表示仅对未知设备要求上报
+    SYSINFO_TTL = int(get_env('SYSINFO_TTL', 86400))
+    # 日志经由有界队列异步写入（监听线程负责格式化与文件写入），队列满时 drop 丢弃或 block 阻塞
+    LOG_QUEUE = str2bool(get_env('LOG_QUEUE', False))
+    LOG_QUEUE_SIZE = int(get_env('LOG_QUEUE_SIZE', 10000))
+    LOG_QUEUE_POLICY = get_env('LOG_QUEUE_POLICY', 'drop')
+    # 请求调试日志（request_debug_log 为 DEBUG 级别时生效）：每 N 个请求记录一个（0 不按比例记录），
+    # 另记录耗时不低于 REQUEST_DEBUG_SLOW_MS 毫秒的请求（0 关闭）
+    REQUEST_DEBUG_SAMPLE_RATE = int(get_env('REQUEST_DEBUG_SAMPLE_RATE', 1))
+    REQUEST_DEBUG_SLOW_MS = float(get_env('REQUEST_DEBUG_SLOW_MS', 0))
+    # 热点路径（心跳、系统信息上报、令牌创建与续期）按间隔（秒）输出一行汇总日志，
+    # 逐条日志默认为 DEBUG 级别，LOG_HOT_PATH_DETAIL 开启时恢复为 INFO
+    LOG_SUMMARY_INTERVAL = float(get_env('LOG_SUMMARY_INTERVAL', 60))
+    LOG_HOT_PATH_DETAIL = str2bool(get_env('LOG_HOT_PATH_DETAIL', False))
+    # 数据清理：长期无心跳设备的心跳记录保留天数（0 不清理），定时清理间隔（秒，0 关闭，可用 manage.py sweep 手动执行）
+    HEARTBEAT_RETENTION_DAYS = int(get_env('HEARTBEAT_RETENTION_DAYS', 30))
+    SWEEP_INTERVAL = float(get_env('SWEEP_INTERVAL', 0))
+    SWEEP_BATCH_SIZE = int(get_env('SWEEP_BATCH_SIZE', 1000))
+    ONLINE_TIMEOUT = int(get_env('ONLINE_TIMEOUT', 60))  # 在线判定阈值（秒），距最后心跳超过该时间视为离线
+    # 节点内共享在线状态表（内存映射文件），多个 worker 无需查库即可判断在线状态
+    PRESENCE_ENABLED = str2bool(get_env('PRESENCE_ENABLED', False))
+    PRESENCE_FILE = get_env('PRESENCE_FILE', '')  # 默认 data/presence.bin
+    PRESENCE_CAPACITY = int(get_env('PRESENCE_CAPACITY', 65536))  # 槽位数量，需大于设备总数
 
 
 class GunicornConfig:
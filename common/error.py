@@ -17,3 +17,12 @@ class UserNotFoundError(BaseError):
 
     def __init__(self, username):
         super().__init__(f"用户不存在: {username}")
+
+
+class TokenSigningKeyError(BaseError):
+    """
+    令牌签名密钥不可用（密钥文件为空）
+    """
+
+    def __init__(self, path):
+        super().__init__(f"令牌签名密钥文件为空: {path}")
@@ -0,0 +1,68 @@
+import logging
+import os
+import threading
+
+from base import DATA_PATH
+from common.shared_table import SharedSlotTable
+
+logger = logging.getLogger(__name__)
+
+
+class Generations:
+    """
+    节点内共享的缓存代数计数器
+
+    写入方在数据变化后递增代数，各 gunicorn worker 读取代数（一次共享内存数组访问）与本地缓存
+    记录的代数比较，不一致即视为失效。共享表不可用时退化为进程内计数，跨进程失效依赖缓存 TTL。
+
+    :param path: 共享表文件路径
+    :param capacity: 代数键的数量上限
+    """
+
+    def __init__(self, path=None, capacity: int = 4096):
+        self.path = path or DATA_PATH / 'generations.bin'
+        self.capacity = capacity
+        self._table: SharedSlotTable | None = None
+        self._pid = None
+        self._local: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def table(self) -> SharedSlotTable | None:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # fork 后重新打开文件，避免与父进程共享 flock 所在的文件描述
+                    try:
+                        self._table = SharedSlotTable(self.path, capacity=self.capacity)
+                    except Exception as e:
+                        self._table = None
+                        logger.warning(f"缓存代数共享表不可用，跨进程失效仅依赖缓存有效期: {e}")
+                    self._pid = pid
+        return self._table
+
+    def get(self, key: str) -> float:
+        """
+        获取当前代数
+
+        :param key: 代数键
+        :rtype: float
+        """
+        table = self.table
+        shared = table.get(key, 0) if table is not None else 0
+        return shared + self._local.get(key, 0)
+
+    def bump(self, key: str) -> None:
+        """
+        递增代数，使所有进程中以该键记录的缓存失效
+
+        :param key: 代数键
+        """
+        table = self.table
+        if table is None or table.incr(key) is None:
+            with self._lock:
+                self._local[key] = self._local.get(key, 0) + 1
+
+
+generations = Generations()
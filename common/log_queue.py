@@ -0,0 +1,117 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+POLICY_DROP = 'drop'
+POLICY_BLOCK = 'block'
+
+# 两次丢弃报告之间的最小间隔（秒）
+DROP_REPORT_INTERVAL = 10
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # 队列已满时等待监听线程腾出空间，保证停止前写完剩余日志
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列日志 handler：请求线程只负责入队，由本进程内的监听线程完成格式化与文件写入
+
+    监听线程在首次写日志时按进程惰性启动，兼容 gunicorn ``preload_app`` 的 fork 模型。
+    队列满时按策略丢弃（``drop``）或阻塞等待（``block``）；丢弃的条数会定期以一条 WARNING 日志报告。
+
+    :param targets: 实际输出的 handler 列表
+    :param maxsize: 队列容量
+    :param policy: 队列满时的策略，``drop`` 或 ``block``
+    """
+
+    def __init__(self, targets: list[logging.Handler], maxsize: int = 10000, policy: str = POLICY_DROP):
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f'不支持的日志队列策略: {policy}')
+        super().__init__(queue.Queue(maxsize))
+        self.targets = targets
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.dropped_total = 0
+        self._last_report = time.monotonic()
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            # fork 后父进程的队列与监听线程不可用，重新创建
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = _QueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self._listener.start()
+            self._pid = pid
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        if self.policy == POLICY_BLOCK:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                self.dropped_total += 1
+                return
+        if self.dropped and time.monotonic() - self._last_report >= DROP_REPORT_INTERVAL:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        count, self.dropped = self.dropped, 0
+        self._last_report = time.monotonic()
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f'日志队列已满，已丢弃 {count} 条日志（累计 {self.dropped_total} 条），请调大 LOG_QUEUE_SIZE',
+            None, None,
+        )
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += count
+
+    def close(self) -> None:
+        # 进程退出时（logging.shutdown）写完队列中剩余的日志
+        if self._listener is not None and self._pid == os.getpid():
+            if self.dropped:
+                self._report_dropped()
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+        super().close()
+
+
+def build_queue_handler(targets, maxsize: int = 10000, policy: str = POLICY_DROP) -> BoundedQueueHandler:
+    """
+    ``logging.config.dictConfig`` 的 handler 工厂
+
+    ``targets`` 使用 ``cfg://handlers.<name>`` 引用其他 handler，引用的 handler 必须已创建
+    （dictConfig 按名称排序创建 handler，队列 handler 的命名需排在目标之后）。
+
+    :param targets: 目标 handler 列表
+    :param maxsize: 队列容量
+    :param policy: 队列满时的策略
+    :rtype: BoundedQueueHandler
+    """
+    resolved = []
+    # ConvertingList 仅在下标访问时解析 cfg:// 引用
+    for i in range(len(targets)):
+        target = targets[i]
+        if not isinstance(target, logging.Handler):
+            raise ValueError(f'日志队列的目标 handler 尚未创建: {targets[i]!r}')
+        resolved.append(target)
+    return BoundedQueueHandler(resolved, maxsize=maxsize, policy=policy)
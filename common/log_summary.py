@@ -0,0 +1,113 @@
+import atexit
+import logging
+import threading
+import time
+
+from common.env import PublicConfig
+
+logger = logging.getLogger(__name__)
+
+_summaries: dict[str, 'LogSummary'] = {}
+_registry_lock = threading.Lock()
+
+
+class LogSummary:
+    """
+    热点路径的聚合日志：调用方只累加计数，每个汇总间隔输出一行汇总
+
+    汇总在计数时顺带检查间隔并输出（无后台线程），进程退出时输出最后一段。
+
+    :param name: 汇总名称（日志行前缀）
+    :param labels: 计数键 -> 展示名称
+    :param interval: 汇总间隔（秒），默认 ``LOG_SUMMARY_INTERVAL``
+    """
+
+    def __init__(self, name: str, labels: dict | None = None, interval: float | None = None):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.interval = PublicConfig.LOG_SUMMARY_INTERVAL if interval is None else interval
+        self._counts: dict[str, int] = {}
+        self._totals: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._since = time.monotonic()
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        """
+        累加计数
+
+        :param key: 计数键
+        :param amount: 增量
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + amount
+            self._totals[key] = self._totals.get(key, 0) + amount
+            if now - self._since < self.interval:
+                return
+            counts, elapsed = self._take(now)
+        self._emit(counts, elapsed)
+
+    def totals(self) -> dict[str, int]:
+        """
+        获取本进程累计计数
+
+        :rtype: dict[str, int]
+        """
+        with self._lock:
+            return dict(self._totals)
+
+    def flush(self) -> None:
+        """
+        立即输出当前间隔内的汇总
+        """
+        with self._lock:
+            counts, elapsed = self._take(time.monotonic())
+        self._emit(counts, elapsed)
+
+    def _take(self, now: float) -> tuple[dict, float]:
+        counts, self._counts = self._counts, {}
+        elapsed, self._since = now - self._since, now
+        return counts, elapsed
+
+    def _emit(self, counts: dict, elapsed: float) -> None:
+        if not counts:
+            return
+        parts = [f"{self.labels.get(key, key)} {count:,}" for key, count in counts.items()]
+        logger.info(f"{self.name}汇总(近{elapsed:.0f}s): {', '.join(parts)}")
+
+
+def get_summary(name: str, labels: dict | None = None) -> LogSummary:
+    """
+    获取（不存在时创建）指定名称的聚合日志
+
+    :param name: 汇总名称
+    :param labels: 计数键 -> 展示名称，会合并到已有的名称映射
+    :rtype: LogSummary
+    """
+    with _registry_lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            summary = _summaries[name] = LogSummary(name)
+        if labels:
+            summary.labels.update(labels)
+        return summary
+
+
+def detail(log: logging.Logger, msg: str, *args) -> None:
+    """
+    输出热点路径的逐条日志：``LOG_HOT_PATH_DETAIL`` 开启时为 INFO，否则为 DEBUG
+
+    :param log: 调用方的 logger
+    :param msg: 日志格式串（%-格式，参数在确需输出时才格式化）
+    """
+    level = logging.INFO if PublicConfig.LOG_HOT_PATH_DETAIL else logging.DEBUG
+    if log.isEnabledFor(level):
+        log.log(level, msg, *args, stacklevel=2)
+
+
+def flush_all() -> None:
+    for summary in list(_summaries.values()):
+        summary.flush()
+
+
+atexit.register(flush_all)
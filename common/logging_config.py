@@ -8,6 +8,8 @@ DEFAULT_ROTATE_WHEN = 'midnight'
 DEFAULT_ROTATE_BACKUP_COUNT = 7
 DEFAULT_FILE_ENCODING = 'utf8'
 DEFAULT_HANDLER_DELAY = True
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_QUEUE_POLICY = 'drop'
 
 
 def build_timed_rotating_file_handler(filename: str, formatter: str, level: Optional[str] = None) -> dict:
@@ -55,6 +57,35 @@ def build_stream_handler(formatter: str, level: Optional[str] = None, stream: Op
     return handler
 
 
+def wrap_handlers_with_queue(config: dict, maxsize: int = DEFAULT_QUEUE_SIZE,
+                             policy: str = DEFAULT_QUEUE_POLICY) -> dict:
+    """
+    将各 logger 直接挂载的 handler 改为经由有界队列转发，文件写入与格式化移到监听线程。
+
+    handler 组合相同的 logger 共用同一个队列 handler。
+
+    :param dict config: logging.config.dictConfig 配置字典（原地修改）
+    :param int maxsize: 队列容量
+    :param str policy: 队列满时的策略，'drop' 丢弃或 'block' 阻塞
+    :return: 修改后的配置字典
+    :rtype: dict
+    """
+    for logger_config in config.get('loggers', {}).values():
+        targets = logger_config.get('handlers')
+        if not targets:
+            continue
+        # dictConfig 按名称排序创建 handler，'~' 排在字母与下划线之后，保证目标 handler 先创建
+        name = '~queue__' + '__'.join(targets)
+        config['handlers'].setdefault(name, {
+            '()': 'common.log_queue.build_queue_handler',
+            'targets': [f'cfg://handlers.{target}' for target in targets],
+            'maxsize': maxsize,
+            'policy': policy,
+        })
+        logger_config['handlers'] = [name]
+    return config
+
+
 # 统一的 formatter 定义，供 Django 与 Gunicorn 复用
 # 注意：保持原有格式行为，方便平滑迁移；如需统一风格，可在此处统一调整
 FORMATTERS: Dict[str, dict] = {
@@ -68,7 +99,8 @@ FORMATTERS: Dict[str, dict] = {
 
 
 def build_django_logging(debug: bool, log_dir: str, app_log_filename: str = 'rustdesk_api.log',
-                         request_debug_filename: str = 'request_debug.log') -> dict:
+                         request_debug_filename: str = 'request_debug.log', use_queue: bool = False,
+                         queue_size: int = DEFAULT_QUEUE_SIZE, queue_policy: str = DEFAULT_QUEUE_POLICY) -> dict:
     """
     构建 Django LOGGING 字典。
 
@@ -76,13 +108,16 @@ def build_django_logging(debug: bool, log_dir: str, app_log_filename: str = 'rus
     :param str log_dir: 日志目录的绝对路径，需可写且已存在
     :param str app_log_filename: 主应用日志文件名
     :param str request_debug_filename: 请求调试日志文件名
+    :param bool use_queue: 是否经由队列异步写日志
+    :param int queue_size: 日志队列容量
+    :param str queue_policy: 队列满时的策略，'drop' 或 'block'
     :return: 可直接赋值给 Django `LOGGING` 的配置字典
     :rtype: dict
     """
     app_log_file = os.path.join(log_dir, app_log_filename)
     request_log_file = os.path.join(log_dir, request_debug_filename)
 
-    return {
+    config = {
         'version': DEFAULT_LOGGING_VERSION,
         'disable_existing_loggers': DEFAULT_DISABLE_EXISTING_LOGGERS,
         'formatters': {
@@ -128,10 +163,14 @@ def build_django_logging(debug: bool, log_dir: str, app_log_filename: str = 'rus
             },
         },
     }
+    if use_queue:
+        wrap_handlers_with_queue(config, queue_size, queue_policy)
+    return config
 
 
 def build_gunicorn_logging(loglevel: str, log_dir: str, error_filename: str = 'gunicorn.log',
-                           access_filename: str = 'gunicorn_access.log') -> dict:
+                           access_filename: str = 'gunicorn_access.log', use_queue: bool = False,
+                           queue_size: int = DEFAULT_QUEUE_SIZE, queue_policy: str = DEFAULT_QUEUE_POLICY) -> dict:
     """
     构建 Gunicorn 使用的 `logconfig_dict`。
 
@@ -139,13 +178,16 @@ def build_gunicorn_logging(loglevel: str, log_dir: str, error_filename: str = 'g
     :param str log_dir: 日志目录的绝对路径，需可写且已存在
     :param str error_filename: 错误日志文件名
     :param str access_filename: 访问日志文件名
+    :param bool use_queue: 是否经由队列异步写日志
+    :param int queue_size: 日志队列容量
+    :param str queue_policy: 队列满时的策略，'drop' 或 'block'
     :return: 兼容 logging.config.dictConfig 的配置字典
     :rtype: dict
     """
     error_log_file = os.path.join(log_dir, error_filename)
     access_log_file = os.path.join(log_dir, access_filename)
 
-    return {
+    config = {
         'version': DEFAULT_LOGGING_VERSION,
         'disable_existing_loggers': DEFAULT_DISABLE_EXISTING_LOGGERS,
         'formatters': {
@@ -179,3 +221,6 @@ def build_gunicorn_logging(loglevel: str, log_dir: str, error_filename: str = 'g
             },
         },
     }
+    if use_queue:
+        wrap_handlers_with_queue(config, queue_size, queue_policy)
+    return config
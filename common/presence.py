@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+
+from base import DATA_PATH
+from common.env import PublicConfig
+from common.shared_table import SharedSlotTable
+
+logger = logging.getLogger(__name__)
+
+
+class Presence:
+    """
+    节点内共享的在线状态表
+
+    心跳到达时把 ``peer_id`` 的最后在线时间（epoch 秒）写入共享内存表，所有 gunicorn worker
+    直接读取数组判断在线状态，无需查询 ``heartbeat`` 表。由 ``PRESENCE_ENABLED`` 开启；
+    仅在单节点内共享，多节点部署请保持关闭，继续使用数据库判断。
+    """
+
+    def __init__(self):
+        self._table: SharedSlotTable | None = None
+        self._unavailable = False
+        self._full_warned = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return PublicConfig.PRESENCE_ENABLED and self.table is not None
+
+    @property
+    def table(self) -> SharedSlotTable | None:
+        if self._table is None and not self._unavailable:
+            with self._lock:
+                if self._table is None and not self._unavailable:
+                    try:
+                        self._table = SharedSlotTable(
+                            PublicConfig.PRESENCE_FILE or DATA_PATH / 'presence.bin',
+                            capacity=PublicConfig.PRESENCE_CAPACITY,
+                        )
+                    except Exception as e:
+                        self._unavailable = True
+                        logger.warning(f"在线状态共享表不可用，回退为数据库查询: {e}")
+        return self._table
+
+    def touch(self, peer_id: str, ts: float | None = None) -> None:
+        """
+        记录设备最后在线时间
+
+        :param peer_id: 设备ID
+        :param ts: 时间戳（秒），默认当前时间
+        """
+        if not self.table.set(peer_id, ts or time.time()) and not self._full_warned:
+            self._full_warned = True
+            logger.warning(f"在线状态共享表已满或设备ID过长，请调大 PRESENCE_CAPACITY: peer_id={peer_id}")
+
+    def is_online(self, peer_id: str, timeout: int | None = None) -> bool:
+        timeout = PublicConfig.ONLINE_TIMEOUT if timeout is None else timeout
+        return self.table.get(peer_id, 0) >= time.time() - timeout
+
+    def online_peer_ids(self, peer_ids=None, timeout: int | None = None) -> set:
+        """
+        获取在线设备ID集合
+
+        :param peer_ids: 待判断的设备ID列表；为 None 时扫描整张表
+        :param timeout: 在线阈值（秒），默认 ``ONLINE_TIMEOUT``
+        :return: 在线设备ID集合
+        :rtype: set
+        """
+        timeout = PublicConfig.ONLINE_TIMEOUT if timeout is None else timeout
+        threshold = time.time() - timeout
+        if peer_ids is None:
+            return {key for key, _ in self.table.items(min_value=threshold)}
+        return {pid for pid in peer_ids if self.table.get(pid, 0) >= threshold}
+
+
+presence = Presence()
@@ -16,7 +16,18 @@ def log_current_env_vars(output_file=None):
     for key, value in os.environ.items():
         if key in [
             'DATABASE', 'DEBUG', 'APP_VERSION', 'SESSION_TIMEOUT',
-            'TOKEN_TIMEOUT', 'HOST', 'PORT', 'WORKERS', 'THREADS',
+            'TOKEN_TIMEOUT', 'TOKEN_CACHE_SIZE', 'TOKEN_CACHE_TTL', 'PERM_CACHE_SIZE', 'PERM_CACHE_TTL',
+            'AB_SNAPSHOT_CACHE_SIZE', 'AB_SNAPSHOT_MAX_PEERS',
+            'TOKEN_ACTIVITY_INTERVAL', 'TOKEN_ACTIVITY_FLUSH_SIZE', 'TOKEN_MODE',
+            'HEARTBEAT_WRITE_BEHIND', 'HEARTBEAT_FLUSH_INTERVAL',
+            'HEARTBEAT_FLUSH_SIZE', 'HEARTBEAT_WRITE_GRANULARITY',
+            'HEARTBEAT_LAST_WRITE_CACHE_SIZE', 'SYSINFO_CACHE_SIZE', 'SYSINFO_CACHE_TTL', 'SYSINFO_TTL',
+            'LOG_QUEUE', 'LOG_QUEUE_SIZE', 'LOG_QUEUE_POLICY',
+            'REQUEST_DEBUG_SAMPLE_RATE', 'REQUEST_DEBUG_SLOW_MS',
+            'LOG_SUMMARY_INTERVAL', 'LOG_HOT_PATH_DETAIL',
+            'HEARTBEAT_RETENTION_DAYS', 'SWEEP_INTERVAL', 'SWEEP_BATCH_SIZE',
+            'ONLINE_TIMEOUT', 'PRESENCE_ENABLED',
+            'PRESENCE_FILE', 'PRESENCE_CAPACITY', 'HOST', 'PORT', 'WORKERS', 'THREADS',
             'WORKER_CLASS', 'TIMEOUT', 'GRACEFUL_TIMEOUT', 'KEEPALIVE',
             'MAX_REQUESTS', 'MAX_REQUESTS_JITTER', 'LOG_LEVEL',
             'ACCESS_LOG', 'ERROR_LOG', 'TZ', 'MYSQL_HOST', 'MYSQL_PORT',
@@ -0,0 +1,167 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 等无 fcntl 的平台
+    fcntl = None
+
+_MAGIC = b'RDSHM001'
+_HEADER = struct.Struct('<8sII')
+_HEADER_SIZE = 64
+
+
+class SharedSlotTable:
+    """
+    基于内存映射文件的定长槽位表，供同一节点上的多个 gunicorn worker 共享数据
+
+    每个槽位由定长 key（UTF-8，右侧补 0）与一个 float64 值组成，key 通过 crc32 开放寻址定位，
+    首次出现时在线程锁与文件锁保护下占用空槽（驻留），之后的读写均为无锁的数组访问。
+    槽位不会回收，容量需按设备规模预留。
+
+    :param path: 映射文件路径
+    :param capacity: 槽位数量
+    :param key_width: 单个 key 的最大字节数
+    """
+
+    def __init__(self, path, capacity: int = 65536, key_width: int = 64):
+        if fcntl is None:
+            raise RuntimeError('当前平台不支持 fcntl，无法使用共享内存表')
+        self.path = str(path)
+        self.capacity = capacity
+        self.key_width = key_width
+        self._keys_offset = _HEADER_SIZE
+        values_offset = self._keys_offset + capacity * key_width
+        self._values_offset = (values_offset + 7) // 8 * 8
+        self._size = self._values_offset + capacity * 8
+        self._slots: dict[str, int] = {}
+        self._slots_lock = threading.Lock()
+        # flock 作用于文件描述，同一进程内共享该描述的线程之间互不排斥，需再加线程锁
+        self._write_lock = threading.Lock()
+        self._open()
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock():
+            header = os.pread(self._fd, _HEADER.size, 0)
+            valid = (
+                len(header) == _HEADER.size
+                and _HEADER.unpack(header) == (_MAGIC, self.capacity, self.key_width)
+                and os.fstat(self._fd).st_size == self._size
+            )
+            if not valid:
+                # 新文件或容量变更：重新初始化
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, self.capacity, self.key_width), 0)
+        self._mm = mmap.mmap(self._fd, self._size)
+        self._values = memoryview(self._mm)[self._values_offset:self._size].cast('d')
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        跨线程、跨进程的互斥区：先取进程内线程锁，再取文件锁
+        """
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _encode(self, key: str) -> bytes | None:
+        raw = key.encode('utf-8')
+        if not raw or len(raw) > self.key_width or b'\0' in raw:
+            return None
+        return raw.ljust(self.key_width, b'\0')
+
+    def _key_at(self, idx: int) -> bytes:
+        start = self._keys_offset + idx * self.key_width
+        return self._mm[start:start + self.key_width]
+
+    def _probe(self, padded: bytes, create: bool) -> int | None:
+        start = zlib.crc32(padded) % self.capacity
+        for i in range(self.capacity):
+            idx = (start + i) % self.capacity
+            current = self._key_at(idx)
+            if current == padded:
+                return idx
+            if current[0] == 0:
+                if not create:
+                    return None
+                with self._file_lock():
+                    # 加锁后重新检查，槽位可能已被其他进程占用
+                    current = self._key_at(idx)
+                    if current[0] == 0:
+                        pos = self._keys_offset + idx * self.key_width
+                        self._mm[pos:pos + self.key_width] = padded
+                        return idx
+                if current == padded:
+                    return idx
+        return None
+
+    def slot(self, key: str, create: bool = False) -> int | None:
+        """
+        获取 key 对应的槽位下标
+
+        :param key: 键
+        :param create: 不存在时是否驻留
+        :return: 槽位下标，不存在或表已满时返回 None
+        :rtype: int | None
+        """
+        idx = self._slots.get(key)
+        if idx is not None:
+            return idx
+        padded = self._encode(key)
+        if padded is None:
+            return None
+        idx = self._probe(padded, create)
+        if idx is not None:
+            with self._slots_lock:
+                self._slots[key] = idx
+        return idx
+
+    def get(self, key: str, default: float | None = None) -> float | None:
+        idx = self.slot(key)
+        if idx is None:
+            return default
+        return self._values[idx]
+
+    def set(self, key: str, value: float) -> bool:
+        idx = self.slot(key, create=True)
+        if idx is None:
+            return False
+        self._values[idx] = value
+        return True
+
+    def incr(self, key: str, amount: float = 1) -> float | None:
+        """
+        跨进程原子自增
+
+        :return: 自增后的值，表已满时返回 None
+        """
+        idx = self.slot(key, create=True)
+        if idx is None:
+            return None
+        with self._file_lock():
+            value = self._values[idx] + amount
+            self._values[idx] = value
+        return value
+
+    def items(self, min_value: float | None = None):
+        """
+        遍历已驻留的 (key, value)
+
+        :param min_value: 仅返回值不小于该值的槽位；先扫描值数组，命中后才解码 key
+        """
+        for idx, value in enumerate(self._values):
+            if min_value is not None and value < min_value:
+                continue
+            key = self._key_at(idx)
+            if key[0] != 0:
+                yield key.rstrip(b'\0').decode('utf-8'), value
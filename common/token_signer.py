@@ -0,0 +1,99 @@
+import logging
+import os
+import secrets
+import threading
+import time
+
+from django.core import signing
+
+from base import DATA_PATH
+from common.env import PublicConfig
+from common.error import TokenSigningKeyError
+
+logger = logging.getLogger(__name__)
+
+_SALT = 'rustdesk_api.token'
+# 读取到空密钥文件时等待其他 worker 写入完成的最长时间（秒）
+_KEY_WAIT_SECONDS = 5
+
+
+class TokenSigner:
+    """
+    无状态访问令牌的签名与校验（HMAC，基于 ``django.core.signing``）
+
+    签名密钥取自 ``TOKEN_SIGNING_KEY``；未配置时在数据目录生成并持久化随机密钥，
+    不使用仓库中公开的 ``SECRET_KEY``。多个 worker 共享同一密钥文件。
+    """
+
+    def __init__(self):
+        self._key = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            with self._lock:
+                if self._key is None:
+                    self._key = PublicConfig.TOKEN_SIGNING_KEY or self._load_or_create_key()
+        return self._key
+
+    @staticmethod
+    def _load_or_create_key() -> str:
+        path = DATA_PATH / 'token_signing.key'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            # 先完整写入临时文件，再以硬链接原子地放到目标路径：其他 worker 要么看不到文件，
+            # 要么看到完整的密钥；并发创建时只有一个链接成功，其余读取胜出者的密钥
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp')
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(secrets.token_urlsafe(48))
+                    f.flush()
+                    os.fsync(f.fileno())
+                try:
+                    os.link(tmp, path)
+                    logger.info(f"已生成令牌签名密钥: {path}")
+                except FileExistsError:
+                    pass
+            finally:
+                tmp.unlink(missing_ok=True)
+
+        # 兼容旧版本直接创建后再写入的密钥文件：内容为空时等待写入完成
+        deadline = time.monotonic() + _KEY_WAIT_SECONDS
+        while True:
+            key = path.read_text().strip()
+            if key:
+                return key
+            if time.monotonic() >= deadline:
+                raise TokenSigningKeyError(path)
+            time.sleep(0.05)
+
+    def dumps(self, payload: dict) -> str:
+        """
+        生成签名令牌
+
+        :param payload: 令牌载荷
+        :return: 令牌字符串
+        :rtype: str
+        """
+        return signing.Signer(key=self.key, salt=_SALT).sign_object(payload)
+
+    def loads(self, token: str) -> dict | None:
+        """
+        校验签名并解析载荷
+
+        :param token: 令牌字符串
+        :return: 签名无效时返回 None
+        :rtype: dict | None
+        """
+        if not token or ':' not in token:
+            return None
+        try:
+            payload = signing.Signer(key=self.key, salt=_SALT).unsign_object(token)
+        except (signing.BadSignature, ValueError):
+            return None
+        return payload if isinstance(payload, dict) else None
+
+
+token_signer = TokenSigner()
@@ -91,7 +91,8 @@ def build_logconfig_dict() -> dict:
         acc_path = os.path.join(LOG_PATH, os.path.basename(access_filename))
 
     return build_gunicorn_logging(GunicornConfig.loglevel, LOG_PATH, os.path.basename(err_path),
-                                  os.path.basename(acc_path))
+                                  os.path.basename(acc_path), use_queue=PublicConfig.LOG_QUEUE,
+                                  queue_size=PublicConfig.LOG_QUEUE_SIZE, queue_policy=PublicConfig.LOG_QUEUE_POLICY)
 
 
 # 将上面的日志配置应用到 Gunicorn
@@ -135,4 +136,21 @@ def post_fork(server, worker):
     :param worker: 当前 worker 实例
     :return: None
     """
+    from apps.db.sweeper import start_sweeper
+
     worker.log.info(f"[gunicorn] worker spawned (pid={worker.pid})")
+    start_sweeper()
+
+
+def worker_exit(server, worker):
+    """
+    子进程退出时回调，刷新进程内写后缓冲（如心跳缓冲），避免平滑重启时丢失数据。
+
+    :param server: Gunicorn Server 实例
+    :param worker: 当前 worker 实例
+    :return: None
+    """
+    from apps.db.write_behind import drain_all
+
+    drain_all()
+    worker.log.info(f"[gunicorn] worker exiting (pid={worker.pid}), write-behind buffers drained")
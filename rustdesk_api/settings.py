@@ -29,7 +29,12 @@ SECRET_KEY = 'django-insecure-)io=oztl360$7mt#&d86kecbaklz^w==@toytn#qepbitg2@hr
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = PublicConfig.DEBUG
 
-LOGGING = build_django_logging(DEBUG, LOG_PATH)
+LOGGING = build_django_logging(
+    DEBUG, LOG_PATH,
+    use_queue=PublicConfig.LOG_QUEUE,
+    queue_size=PublicConfig.LOG_QUEUE_SIZE,
+    queue_policy=PublicConfig.LOG_QUEUE_POLICY,
+)
 
 ALLOWED_HOSTS = ['*']
 